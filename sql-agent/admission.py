@@ -0,0 +1,283 @@
+"""Admission control for LLM calls: global cap, per-user quotas, bounded queues.
+
+Every model call made by the agents passes through one process-wide
+``AdmissionController``: first the caller's per-user/thread quota, then the
+global cap on in-flight LLM calls. A caller that cannot run yet waits in a
+FIFO queue until a slot is handed to it or its deadline passes; when the
+queue is already full it is rejected immediately with ``AdmissionRejected``
+instead of piling more load onto the model server.
+
+``langgraph dev`` serves compiled graphs, so admission sits inside them at the
+model-call boundary (``AdmissionMiddleware`` for the prebuilt agent,
+``admit_llm_call`` in the custom graph's nodes) rather than around the graph.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Iterator, Optional
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_config
+
+from config import settings
+from logging_config import get_logger
+from telemetry import admission_in_flight, admission_queue_depth, admission_rejected, admission_wait
+
+logger = get_logger(__name__)
+
+
+class AdmissionRejected(RuntimeError):
+    """The call was not admitted: the wait queue was full or the deadline passed."""
+
+
+class _Waiter:
+    """A queued caller: woken through a thread event (sync) or a future (async)."""
+
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(
+        self,
+        event: Optional[threading.Event] = None,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        future: Optional[asyncio.Future] = None,
+    ):
+        self.event = event
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """At most ``limit`` holders at once; a FIFO queue of at most ``max_queue`` waiters.
+
+    Usable from threads and event loops alike. A released slot is handed
+    directly to the oldest waiter, so later arrivals cannot overtake the queue.
+    ``limit <= 0`` disables the limiter.
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+        # Export the series at 0 before the first call
+        admission_queue_depth.inc(0, limiter=name)
+        admission_in_flight.inc(0, limiter=name)
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def idle(self) -> bool:
+        return self.in_flight == 0 and not self._waiters
+
+    def _enter(self, waiter: _Waiter) -> bool:
+        """Take a free slot (True) or queue ``waiter`` (False); raise if the queue is full."""
+        with self._lock:
+            if self.in_flight < self.limit and not self._waiters:
+                self.in_flight += 1
+                admission_in_flight.inc(limiter=self.name)
+                return True
+            if len(self._waiters) >= self.max_queue:
+                admission_rejected.inc(limiter=self.name, reason="queue_full")
+                logger.warning("Rejected LLM call: %s admission queue is full", self.name)
+                raise AdmissionRejected(
+                    f"{self.name} admission queue is full ({self.max_queue} waiting); try again later"
+                )
+            self._waiters.append(waiter)
+            admission_queue_depth.inc(limiter=self.name)
+            return False
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Drop a waiter that gave up; False if a slot was handed to it meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            self._waiters.remove(waiter)
+            admission_queue_depth.dec(limiter=self.name)
+            return True
+
+    def _timed_out(self, started: float) -> AdmissionRejected:
+        admission_rejected.inc(limiter=self.name, reason="timeout")
+        logger.warning("Rejected LLM call: %s admission deadline passed", self.name)
+        return AdmissionRejected(
+            f"waited {time.perf_counter() - started:.1f}s for {self.name} admission; try again later"
+        )
+
+    def acquire(self, timeout: Optional[float] = None) -> None:
+        """Block until a slot is free; raise ``AdmissionRejected`` if it cannot be had in time."""
+        if self.limit <= 0:
+            return
+        started = time.perf_counter()
+        waiter = _Waiter(event=threading.Event())
+        if not self._enter(waiter):
+            if not waiter.event.wait(timeout) and self._abandon(waiter):
+                admission_wait.observe(time.perf_counter() - started, limiter=self.name)
+                raise self._timed_out(started)
+        admission_wait.observe(time.perf_counter() - started, limiter=self.name)
+
+    async def aacquire(self, timeout: Optional[float] = None) -> None:
+        """Async ``acquire``: waits without blocking the event loop."""
+        if self.limit <= 0:
+            return
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(loop=loop, future=loop.create_future())
+        if not self._enter(waiter):
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+            except asyncio.TimeoutError:
+                if self._abandon(waiter):
+                    admission_wait.observe(time.perf_counter() - started, limiter=self.name)
+                    raise self._timed_out(started) from None
+            except asyncio.CancelledError:
+                if not self._abandon(waiter):
+                    self.release()
+                raise
+        admission_wait.observe(time.perf_counter() - started, limiter=self.name)
+
+    def release(self) -> None:
+        """Free a slot, handing it to the oldest waiter if there is one."""
+        if self.limit <= 0:
+            return
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                admission_queue_depth.dec(limiter=self.name)
+                waiter.granted = True
+                waiter.wake()
+                return
+            self.in_flight -= 1
+            admission_in_flight.dec(limiter=self.name)
+
+    @contextmanager
+    def slot(self, timeout: Optional[float] = None) -> Iterator[None]:
+        self.acquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        await self.aacquire(timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AdmissionController:
+    """Per-user quota, then the global LLM cap, within one deadline per call."""
+
+    def __init__(self, max_llm_calls: int, max_calls_per_user: int, max_queue: int, timeout: float):
+        self.llm = ConcurrencyLimiter("llm", max_llm_calls, max_queue)
+        self.max_calls_per_user = max_calls_per_user
+        self.max_queue = max_queue
+        self.timeout = timeout
+        # user key -> (limiter, callers holding or waiting on it)
+        self._users: dict[str, tuple[ConcurrencyLimiter, int]] = {}
+        self._users_lock = threading.Lock()
+
+    def _checkout(self, user: str) -> ConcurrencyLimiter:
+        with self._users_lock:
+            limiter, users = self._users.get(user) or (
+                ConcurrencyLimiter("user", self.max_calls_per_user, self.max_queue),
+                0,
+            )
+            self._users[user] = (limiter, users + 1)
+            return limiter
+
+    def _checkin(self, user: str) -> None:
+        """Forget idle per-user limiters so the map does not grow without bound."""
+        with self._users_lock:
+            limiter, users = self._users[user]
+            if users == 1:
+                del self._users[user]
+            else:
+                self._users[user] = (limiter, users - 1)
+
+    def _remaining(self, deadline: float) -> float:
+        return max(0.0, deadline - time.perf_counter())
+
+    @contextmanager
+    def llm_call(self, user: str) -> Iterator[None]:
+        deadline = time.perf_counter() + self.timeout
+        user_limiter = self._checkout(user)
+        try:
+            with user_limiter.slot(self._remaining(deadline)):
+                with self.llm.slot(self._remaining(deadline)):
+                    yield
+        finally:
+            self._checkin(user)
+
+    @asynccontextmanager
+    async def allm_call(self, user: str) -> AsyncIterator[None]:
+        deadline = time.perf_counter() + self.timeout
+        user_limiter = self._checkout(user)
+        try:
+            async with user_limiter.aslot(self._remaining(deadline)):
+                async with self.llm.aslot(self._remaining(deadline)):
+                    yield
+        finally:
+            self._checkin(user)
+
+
+@lru_cache(maxsize=None)
+def get_admission_controller() -> AdmissionController:
+    """The process-wide controller configured from settings."""
+    return AdmissionController(
+        max_llm_calls=settings.admission_max_llm_calls,
+        max_calls_per_user=settings.admission_max_calls_per_user,
+        max_queue=settings.admission_max_queue,
+        timeout=settings.admission_queue_timeout_seconds,
+    )
+
+
+def user_key(config: Optional[RunnableConfig] = None) -> str:
+    """Quota key for a run: its user id, else its thread id, else "anonymous"."""
+    if config is None:
+        try:
+            config = get_config()
+        except RuntimeError:  # outside a runnable context
+            config = {}
+    configurable = (config or {}).get("configurable", {})
+    for field in ("user_id", "langgraph_auth_user_id", "thread_id"):
+        if configurable.get(field):
+            return f"{field}:{configurable[field]}"
+    return "anonymous"
+
+
+def admit_llm_call(config: Optional[RunnableConfig] = None):
+    """Context manager around one synchronous LLM call (graph nodes)."""
+    return get_admission_controller().llm_call(user_key(config))
+
+
+class AdmissionMiddleware(AgentMiddleware):
+    """Admit each model call of a prebuilt agent; place it innermost (after retries)."""
+
+    def wrap_model_call(self, request, handler):
+        with get_admission_controller().llm_call(user_key()):
+            return handler(request)
+
+    async def awrap_model_call(self, request, handler):
+        async with get_admission_controller().allm_call(user_key()):
+            return await handler(request)
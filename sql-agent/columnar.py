@@ -0,0 +1,200 @@
+"""Columnar query results: one array per column instead of Python row tuples.
+
+Numeric columns are stored as contiguous ``int64``/``float64`` buffers, so
+summaries (count, sum, min, max, mean) are vectorized and ``to_arrow`` can
+wrap the same memory without copying. The row-tuple text the LLM sees is
+rendered lazily, only when asked for, and cached.
+
+Checkpointed tool messages come back with the artifact as a plain dict of the
+dataclass fields; ``ColumnarResult.from_dict`` turns it back into a result.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional, Sequence
+
+import numpy as np
+from langchain_community.utilities.sql_database import truncate_word
+
+_INT64_MIN, _INT64_MAX = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+
+
+def _to_array(values: Sequence[Any]) -> tuple[Any, Optional[np.ndarray], str]:
+    """Build a typed column array, its null mask (None without nulls) and its kind.
+
+    Only columns whose values are all ``int`` (fitting int64) or all ``float``
+    get an array, so every value round-trips exactly and renders as
+    ``SQLDatabase.run`` does; NULL slots hold 0 / NaN and are flagged in the
+    mask. Anything else, including mixed int/float columns, stays a plain
+    list: NumPy object arrays gain nothing and cannot be checkpointed by
+    LangGraph's serializer.
+    """
+    nulls = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    has_nulls = bool(nulls.any())
+    present = [v for v in values if v is not None] if has_nulls else values
+    if (
+        present
+        and all(type(v) is int for v in present)
+        and all(_INT64_MIN <= v <= _INT64_MAX for v in present)
+    ):
+        array = np.array([0 if v is None else v for v in values] if has_nulls else values, dtype=np.int64)
+        kind = "int"
+    elif present and all(type(v) is float for v in present):
+        array = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        kind = "float"
+    else:
+        array = list(values)
+        kind = "object"
+    return array, (nulls if has_nulls else None), kind
+
+
+@dataclass
+class ColumnarResult:
+    """Query result stored column by column."""
+
+    columns: list[str]
+    arrays: list[Any]  # np.ndarray for numeric columns, list otherwise
+    nulls: list[Optional[np.ndarray]]
+    kinds: list[str]
+    max_string_length: int = 300
+    max_text_rows: int = 0
+    _text: Optional[str] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_rows(
+        cls,
+        columns: Sequence[str],
+        rows: Sequence[Sequence[Any]],
+        max_string_length: int = 300,
+        max_text_rows: int = 0,
+    ) -> "ColumnarResult":
+        """Transpose fetched rows into one typed array per column."""
+        return cls.from_batches(columns, [rows], max_string_length, max_text_rows)
+
+    @classmethod
+    def from_batches(
+        cls,
+        columns: Sequence[str],
+        batches: Iterable[Sequence[Sequence[Any]]],
+        max_string_length: int = 300,
+        max_text_rows: int = 0,
+    ) -> "ColumnarResult":
+        """Build from row batches (e.g. ``fetchmany``) without keeping the rows.
+
+        Each batch is appended to per-column value lists and dropped; each list
+        is freed as soon as its array is built, so the full set of row tuples
+        and the arrays are never held together.
+        """
+        values: list[Optional[list]] = [[] for _ in columns]
+        for batch in batches:
+            for column, batch_values in zip(values, zip(*batch)):
+                column.extend(batch_values)
+        arrays, nulls, kinds = [], [], []
+        for idx in range(len(values)):
+            array, mask, kind = _to_array(values[idx])
+            values[idx] = None
+            arrays.append(array)
+            nulls.append(mask)
+            kinds.append(kind)
+        return cls(list(columns), arrays, nulls, kinds, max_string_length, max_text_rows)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ColumnarResult":
+        """Rebuild a result from its dict form (the dataclass fields).
+
+        This is what a checkpointed ``ToolMessage.artifact`` deserializes to:
+        numeric ``arrays`` and ``nulls`` masks are NumPy arrays after a
+        checkpointer round-trip, or lists (``None``/NaN for NULL) in JSON, e.g.
+        from the ``langgraph dev`` API. Object columns are lists either way.
+        """
+        arrays, nulls = [], []
+        for array, mask, kind in zip(data["arrays"], data["nulls"], data["kinds"]):
+            if kind == "object":
+                arrays.append(list(array))
+            elif isinstance(array, np.ndarray):
+                arrays.append(array)
+            else:
+                null = 0 if kind == "int" else np.nan
+                dtype = np.int64 if kind == "int" else np.float64
+                arrays.append(np.array([null if v is None else v for v in array], dtype=dtype))
+            nulls.append(None if mask is None else np.asarray(mask, dtype=bool))
+        return cls(
+            list(data["columns"]),
+            arrays,
+            nulls,
+            list(data["kinds"]),
+            data.get("max_string_length", 300),
+            data.get("max_text_rows", 0),
+        )
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.arrays[0]) if self.arrays else 0
+
+    def _column_values(self, idx: int, stop: Optional[int] = None) -> list:
+        array, mask, kind = self.arrays[idx][:stop], self.nulls[idx], self.kinds[idx]
+        if kind == "object":
+            return [truncate_word(v, length=self.max_string_length) for v in array]
+        if mask is None:
+            return array.tolist()
+        return [None if null else v for v, null in zip(array.tolist(), mask[:stop].tolist())]
+
+    def rows(self, stop: Optional[int] = None) -> Iterator[tuple]:
+        """Row tuples (string values truncated like ``SQLDatabase.run``)."""
+        return zip(*(self._column_values(i, stop) for i in range(len(self.columns))))
+
+    def to_text(self) -> str:
+        """The ``str(list_of_tuples)`` rendering ``SQLDatabase.run`` produces, built once.
+
+        With ``max_text_rows`` set, larger results show only the first rows
+        followed by a vectorized summary of the numeric columns.
+        """
+        if self._text is None:
+            if self.num_rows == 0:
+                self._text = ""
+            elif self.max_text_rows and self.num_rows > self.max_text_rows:
+                shown = str(list(self.rows(self.max_text_rows)))
+                self._text = (
+                    f"{shown}\n(showing {self.max_text_rows} of {self.num_rows} rows; "
+                    f"numeric summary: {self.summary()})"
+                )
+            else:
+                self._text = str(list(self.rows()))
+        return self._text
+
+    def __str__(self) -> str:
+        return self.to_text()
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Count, sum, min, max and mean of each numeric column, ignoring NULLs."""
+        stats = {}
+        for name, array, mask, kind in zip(self.columns, self.arrays, self.nulls, self.kinds):
+            if kind == "object":
+                continue
+            if mask is not None:
+                array = array[~mask]
+            count = array.size
+            if count == 0:
+                stats[name] = {"count": 0}
+                continue
+            total, low, high = array.sum(), array.min(), array.max()
+            stats[name] = {
+                "count": count,
+                "sum": total.item(),
+                "min": low.item(),
+                "max": high.item(),
+                "mean": total.item() / count,
+            }
+        return stats
+
+    def to_arrow(self):
+        """Return a ``pyarrow.RecordBatch``; numeric columns share the NumPy buffers."""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("pyarrow is required for ColumnarResult.to_arrow()") from e
+        arrays = []
+        for array, mask, kind in zip(self.arrays, self.nulls, self.kinds):
+            if kind == "object":
+                arrays.append(pa.array(array))
+            else:
+                arrays.append(pa.array(array, mask=mask))
+        return pa.RecordBatch.from_arrays(arrays, names=self.columns)
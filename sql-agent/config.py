@@ -8,6 +8,9 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 _env_file = Path(__file__).resolve().parent / ".env"
 _logger = logging.getLogger(__name__)
 
+ROUTING_POLICIES = ("single", "per_node", "escalate")
+SQL_RESULT_FORMATS = ("rows", "columnar")
+
 
 class Settings(BaseSettings):
     """All app configuration; loaded from .env at project root."""
@@ -28,8 +31,59 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("GOOGLE_API_KEY", "GEMINI_API_KEY"),
     )
 
+    # Per-node model routing; an empty model name falls back to llm_model.
+    # single: every node uses llm_model. per_node: each node uses its own model.
+    # escalate: per_node, then switch query generation/checking to
+    # llm_escalation_model once SQL execution fails or check_query rewrites a query.
+    llm_routing_policy: str = "single"
+    llm_schema_model: str = ""
+    llm_query_model: str = ""
+    llm_check_model: str = ""
+    llm_escalation_model: str = ""
+
+    # LLM transport: one pooled keep-alive HTTP client per model, per-call timeouts
+    llm_timeout_seconds: float = 120.0
+    llm_connect_timeout_seconds: float = 5.0
+    llm_max_connections: int = 10
+    llm_max_keepalive_connections: int = 5
+    llm_keepalive_expiry_seconds: float = 60.0
+
+    # Prompt-prefix caching. Ollama: keep the model (and its KV cache) loaded between
+    # requests, e.g. "30m", or -1 to never unload; empty uses the server default (5m).
+    # Gemini: name of a cachedContents resource holding the static prompt prefix.
+    llm_keep_alive: str = ""
+    gemini_cached_content: str = ""
+
+    # LLM retries: bounded, jittered exponential backoff on transient errors (per node)
+    llm_max_retries: int = 2
+    llm_retry_initial_delay_seconds: float = 0.5
+    llm_retry_backoff_factor: float = 2.0
+    llm_retry_max_delay_seconds: float = 8.0
+
+    # Admission control in front of the LLM (0 disables a limit). At most
+    # admission_max_llm_calls model calls run at once and each user/thread may have
+    # admission_max_calls_per_user in flight; others wait in a FIFO queue of at most
+    # admission_max_queue callers for up to admission_queue_timeout_seconds, and are
+    # rejected immediately when the queue is full.
+    admission_max_llm_calls: int = 4
+    admission_max_calls_per_user: int = 2
+    admission_max_queue: int = 32
+    admission_queue_timeout_seconds: float = 30.0
+
     # SQLite
     sqlite_database: str = "chinook.db"
+    # Query results: "rows" (Python tuples) or "columnar" (one NumPy array per column,
+    # attached to the tool message as an artifact; LLM text rendered from it)
+    sql_result_format: str = "rows"
+    # Columnar only: rows shown to the LLM before falling back to a numeric summary (0 = all)
+    sql_text_max_rows: int = 0
+
+    # Few-shot SQL examples: top-k verified (question, SQL) pairs injected per question
+    few_shot_enabled: bool = True
+    few_shot_k: int = 3
+    few_shot_min_score: float = 0.2
+    few_shot_store_path: str = "few_shot_examples.jsonl"
+    few_shot_record_production: bool = False
 
     # LangSmith (optional)
     langsmith_api_key: str = ""
@@ -40,6 +94,13 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = "INFO"
 
+    # Local telemetry: JSON spans per node/LLM call/SQL statement, Prometheus-style metrics
+    telemetry_enabled: bool = True
+    telemetry_spans_path: str = ""  # JSON lines file; empty logs spans at DEBUG level
+    metrics_path: str = ""  # Prometheus text file, rewritten every metrics_flush_seconds
+    metrics_flush_seconds: float = 15.0
+    metrics_port: int = 0  # serve /metrics on 127.0.0.1:<port>; 0 disables
+
     @model_validator(mode="after")
     def gemini_requires_api_key(self) -> "Settings":
         if self.llm_provider == "gemini" and not (self.google_api_key or "").strip():
@@ -51,6 +112,32 @@ class Settings(BaseSettings):
             )
         return self
 
+    @model_validator(mode="after")
+    def routing_policy_is_known(self) -> "Settings":
+        if self.llm_routing_policy not in ROUTING_POLICIES:
+            _logger.error(
+                "Unknown LLM_ROUTING_POLICY=%r; use one of %s",
+                self.llm_routing_policy,
+                ", ".join(ROUTING_POLICIES),
+            )
+            raise ValueError(
+                f"Unknown LLM_ROUTING_POLICY={self.llm_routing_policy!r}; "
+                f"use one of {', '.join(ROUTING_POLICIES)}"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def sql_result_format_is_known(self) -> "Settings":
+        if self.sql_result_format not in SQL_RESULT_FORMATS:
+            _logger.error(
+                "Unknown SQL_RESULT_FORMAT=%r; use 'rows' or 'columnar'",
+                self.sql_result_format,
+            )
+            raise ValueError(
+                f"Unknown SQL_RESULT_FORMAT={self.sql_result_format!r}; use 'rows' or 'columnar'"
+            )
+        return self
+
 
 settings = Settings()
 _logger.debug("Configuration loaded from %s", _env_file)
@@ -1,8 +1,8 @@
 """Custom SQL agent using LangGraph primitives."""
+import re
 from typing import Literal
 
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from langchain_core.messages import AIMessage, SystemMessage, ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
 from langchain.tools import tool
 from langgraph.checkpoint.memory import InMemorySaver
@@ -11,11 +11,16 @@ from langgraph.prebuilt import ToolNode
 from langgraph.types import interrupt
 
 from langchain_community.utilities import SQLDatabase
-from config import get_sqlite_connection_uri
-from llm import get_llm
+from admission import admit_llm_call
+from config import get_sqlite_connection_uri, settings
+from database import SQLAgentDatabase, SQLAgentToolkit, execute_query
+from example_store import few_shot_messages, record_success
+from llm import bind_tools_cached, get_llm, get_node_llm, get_retry_policy
 from logging_config import get_logger, setup_logging
+from telemetry import get_callbacks, setup_telemetry
 
 setup_logging()
+setup_telemetry()
 logger = get_logger(__name__)
 
 def db_info(db: SQLDatabase) -> None:
@@ -30,7 +35,7 @@ def db_info(db: SQLDatabase) -> None:
 def connect_database() -> SQLDatabase:
     """Connect to SQLite and return the SQLDatabase instance."""
     try:
-        db = SQLDatabase.from_uri(get_sqlite_connection_uri())
+        db = SQLAgentDatabase.from_uri(get_sqlite_connection_uri())
         logger.info("Connected to SQLite database")
         db_info(db)
         return db
@@ -43,35 +48,64 @@ model = get_llm()
 db = connect_database()
 
 # SQL tools for the agent
-toolkit = SQLDatabaseToolkit(db=db, llm=model)
+toolkit = SQLAgentToolkit(db=db, llm=model)
 tools = toolkit.get_tools()
 
 list_tables_tool = next(tool for tool in tools if tool.name == "sql_db_list_tables")
 get_schema_tool = next(tool for tool in tools if tool.name == "sql_db_schema")
-run_query_tool = next(tool for tool in tools if tool.name == "sql_db_query")
+db_query_tool = next(tool for tool in tools if tool.name == "sql_db_query")
 
 # Define the custom tool
 @tool(
-    run_query_tool.name,
-    description=run_query_tool.description,
-    args_schema=run_query_tool.args_schema
+    db_query_tool.name,
+    description=db_query_tool.description,
+    args_schema=db_query_tool.args_schema,
+    response_format="content_and_artifact",
 )
 def run_query_tool(config: RunnableConfig, **tool_input):
     """Execute a SQL query with human-in-the-loop interrupt."""
     request = {
-        "action": run_query_tool.name,
+        "action": db_query_tool.name,
         "args": tool_input,
         "description": "Please review the SQL query before execution."
     }
     # This will pause the execution and wait for human input
     logger.info("Interrupting for human review of SQL query")
-    return run_query_tool.invoke(tool_input, config)
+    # (result text, columnar artifact or None)
+    return execute_query(db, tool_input["query"])
+
+class SQLAgentState(MessagesState):
+    """Graph state: messages plus whether the run escalated to the larger model."""
+
+    escalated: bool
+
+
+def _routing_policy(config: RunnableConfig) -> str:
+    """Routing policy for this run: the ``config["configurable"]`` override, else the setting."""
+    return (config or {}).get("configurable", {}).get("routing_policy") or settings.llm_routing_policy
+
+
+# Quoted string literals and identifiers ('' / "" escape a quote inside them)
+_SQL_QUOTED = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")""")
+
+
+def _normalize_sql(query: str) -> str:
+    """Collapse whitespace, keyword case and trailing semicolons for query comparison.
+
+    Quoted literals are kept verbatim: changing ``'rock'`` to ``'Rock'`` is a rewrite.
+    """
+    parts = _SQL_QUOTED.split(query.strip().rstrip(";").strip())
+    return "".join(
+        part if idx % 2 else re.sub(r"\s+", " ", part).lower()
+        for idx, part in enumerate(parts)
+    ).strip()
+
 
 # Nodes
 get_schema_node = ToolNode([get_schema_tool], name="get_schema")
 run_query_node = ToolNode([run_query_tool], name="run_query")
 
-def list_tables(state: MessagesState):
+def list_tables(state: SQLAgentState):
     """Step 1: List tables in the database."""
     tool_call = {
         "name": "sql_db_list_tables",
@@ -88,22 +122,46 @@ def list_tables(state: MessagesState):
     tool_message = ToolMessage(content=content, tool_call_id=tool_call["id"])
 
     response = AIMessage(content=f"Available tables: {content}")
-    return {"messages": [tool_call_message, tool_message, response]}
-
-def call_get_schema(state: MessagesState):
-    """Step 2: Decide which tables' schemas to fetch."""
-    # Force the model to use the get_schema_tool
-    llm_with_tools = model.bind_tools([get_schema_tool], tool_choice="any")
-    response = llm_with_tools.invoke(state["messages"])
-    return {"messages": [response]}
-
-generate_query_system_prompt = """
+    # Each run starts here: a new question on a checkpointed thread starts unescalated
+    return {"messages": [tool_call_message, tool_message, response], "escalated": False}
+
+# Prompt layout for prefix caching: every LLM call starts with the same system
+# text (shared instructions plus the table list), built once, so Ollama's KV
+# cache and hosted prompt caches can reuse it across nodes and questions.
+# Node-specific rules follow it; per-question content (few-shot examples, the
+# question, tool results) only ever comes after the system message.
+shared_system_prompt = """
 You are an agent designed to interact with a SQL database.
 If the user asks a question about you, you can answer about yourself and your capabilities.
 Don't run any tools to answer the question about yourself.
 Apart from that, you should answer the question based on the database.
 Do not answer any question that is not related to the database or yourself.
 
+DO NOT make any DML statements (INSERT, UPDATE, DELETE, DROP etc.) to the database.
+
+The {dialect} database has these tables: {tables}
+""".format(
+    dialect=db.dialect,
+    tables=", ".join(db.get_usable_table_names()),
+)
+
+get_schema_system_prompt = shared_system_prompt + """
+Your current task: call the schema tool for the tables that are relevant to the
+user's question.
+"""
+get_schema_system_message = SystemMessage(content=get_schema_system_prompt)
+
+def call_get_schema(state: SQLAgentState, config: RunnableConfig):
+    """Step 2: Decide which tables' schemas to fetch."""
+    # Table selection is routine work: it never escalates to the larger model
+    node_model = get_node_llm("schema", _routing_policy(config))
+    # Force the model to use the get_schema_tool
+    llm_with_tools = bind_tools_cached(node_model, [get_schema_tool], tool_choice="any")
+    with admit_llm_call(config):
+        response = llm_with_tools.invoke([get_schema_system_message] + state["messages"])
+    return {"messages": [response]}
+
+generate_query_system_prompt = shared_system_prompt + """
 Given an input question, create a syntactically correct {dialect} query to run,
 then look at the results of the query and return the answer. Unless the user
 specifies a specific number of examples they wish to obtain, always limit your
@@ -113,8 +171,6 @@ You can order the results by a relevant column to return the most interesting
 examples in the database. Never query for all the columns from a specific table,
 only ask for the relevant columns given the question.
 
-DO NOT make any DML statements (INSERT, UPDATE, DELETE, DROP etc.) to the database.
-
 To start you should ALWAYS look at the tables in the database to see what you
 can query. Do NOT skip this step.
 
@@ -127,18 +183,39 @@ Always run a query to get the actual current data.
     dialect=db.dialect,
     top_k=5,
 )
+generate_query_system_message = SystemMessage(content=generate_query_system_prompt)
 
-def generate_query(state: MessagesState):
+def generate_query_messages(messages: list) -> list:
+    """Static system prompt, then retrieved examples, then the conversation."""
+    return [generate_query_system_message, *few_shot_messages(messages), *messages]
+
+def generate_query(state: SQLAgentState, config: RunnableConfig):
     """Step 3: Generate the SQL query."""
-    system_message = SystemMessage(content=generate_query_system_prompt)
+    policy = _routing_policy(config)
+    escalated = state.get("escalated", False)
+    last_message = state["messages"][-1]
+    if (
+        policy == "escalate"
+        and isinstance(last_message, ToolMessage)
+        and str(last_message.content).startswith("Error")
+    ):
+        # SQL execution failed: hand the retry to the larger model
+        escalated = True
+
+    node_model = get_node_llm("query", policy, escalated)
     # Force the model to call run_query_tool
-    llm_with_tools = model.bind_tools([run_query_tool], tool_choice="any")
-    response = llm_with_tools.invoke([system_message] + state["messages"])
-    return {"messages": [response]}
-
-check_query_system_prompt = """
-You are a SQL expert with a strong attention to detail.
-Double check the {dialect} query for common mistakes, including:
+    llm_with_tools = bind_tools_cached(node_model, [run_query_tool], tool_choice="any")
+    with admit_llm_call(config):
+        response = llm_with_tools.invoke(generate_query_messages(state["messages"]))
+    if not response.tool_calls and (config or {}).get("configurable", {}).get("record_examples", True):
+        # Final answer: remember the query that produced it
+        record_success(state["messages"])
+    return {"messages": [response], "escalated": escalated}
+
+check_query_system_prompt = shared_system_prompt + """
+Your current task: double check the {dialect} query in the user message, with a
+strong attention to detail. That message is a query to review, not a question to
+answer. Look for common mistakes, including:
 - Using NOT IN with NULL values
 - Using UNION when UNION ALL should have been used
 - Using BETWEEN for exclusive ranges
@@ -153,37 +230,67 @@ just reproduce the original query.
 
 You will call the appropriate tool to execute the query after running this check.
 """.format(dialect=db.dialect)
+check_query_system_message = SystemMessage(content=check_query_system_prompt)
+
+# Every LLM node's system prompt: the --incremental eval fingerprint hashes all of them
+system_prompts = (
+    get_schema_system_prompt,
+    generate_query_system_prompt,
+    check_query_system_prompt,
+)
+
+def check_query_messages(query: str) -> list:
+    """Static system prompt, then the query to check."""
+    return [check_query_system_message, HumanMessage(content=query)]
 
-def check_query(state: MessagesState):
+def check_query(state: SQLAgentState, config: RunnableConfig):
     """Step 4: Verify the generated query."""
-    system_message = SystemMessage(content=check_query_system_prompt)
 
     last_message = state["messages"][-1]
     if not last_message.tool_calls:
         return {"messages": []}
 
     tool_call = last_message.tool_calls[0]
-    # Use the model to check the query by presenting it as a user message
-    user_message = {"role": "user", "content": tool_call["args"]["query"]}
+    policy = _routing_policy(config)
+    escalated = state.get("escalated", False)
+    node_model = get_node_llm("check", policy, escalated)
     # Force tool call to sql_db_query
-    llm_with_tools = model.bind_tools([run_query_tool], tool_choice="any")
-    response = llm_with_tools.invoke([system_message, user_message])
-    return {"messages": [response]}
-
-def should_continue(state: MessagesState) -> Literal["check_query", END]:
+    llm_with_tools = bind_tools_cached(node_model, [run_query_tool], tool_choice="any")
+    # The query to check is presented as a user message after the static prefix
+    with admit_llm_call(config):
+        response = llm_with_tools.invoke(check_query_messages(tool_call["args"]["query"]))
+
+    if policy == "escalate" and not escalated and response.tool_calls:
+        checked_query = response.tool_calls[0]["args"].get("query", "")
+        # The checker had to rewrite the query: later steps use the larger model
+        escalated = _normalize_sql(checked_query) != _normalize_sql(tool_call["args"]["query"])
+    return {"messages": [response], "escalated": escalated}
+
+def should_continue(state: SQLAgentState) -> Literal["check_query", END]:
     """Conditional edge to determine if we should check the query or end."""
     last_message = state["messages"][-1]
     if not last_message.tool_calls:
         return END
     return "check_query"
 
+def after_query(state: SQLAgentState, config: RunnableConfig) -> Literal["generate_query", END]:
+    """Conditional edge after run_query: loop back, or stop at the SQL step in sql_only runs."""
+    last_message = state["messages"][-1]
+    sql_only = (config or {}).get("configurable", {}).get("sql_only", False)
+    if sql_only and not str(last_message.content).startswith("Error"):
+        return END
+    return "generate_query"
+
 # Assemble the graph
-builder = StateGraph(MessagesState)
+# LLM nodes retry on their own with backoff, so a transient failure re-runs one step
+llm_retry_policy = get_retry_policy()
+
+builder = StateGraph(SQLAgentState)
 builder.add_node(list_tables)
-builder.add_node(call_get_schema)
+builder.add_node(call_get_schema, retry_policy=llm_retry_policy)
 builder.add_node("get_schema", get_schema_node)
-builder.add_node(generate_query)
-builder.add_node(check_query)
+builder.add_node(generate_query, retry_policy=llm_retry_policy)
+builder.add_node(check_query, retry_policy=llm_retry_policy)
 builder.add_node("run_query", run_query_node)
 
 builder.add_edge(START, "list_tables")
@@ -192,10 +299,25 @@ builder.add_edge("call_get_schema", "get_schema")
 builder.add_edge("get_schema", "generate_query")
 builder.add_conditional_edges("generate_query", should_continue)
 builder.add_edge("check_query", "run_query")
-builder.add_edge("run_query", "generate_query")
+builder.add_conditional_edges("run_query", after_query)
+
+
+agent = builder.compile().with_config(callbacks=get_callbacks())
+
 
+def get_eval_agent(routing_policy: str | None = None, sql_only: bool = False):
+    """Return the custom graph pinned to a routing policy for evaluation runs.
 
-agent = builder.compile()
+    With ``sql_only`` the run ends once a query executes without error, skipping
+    the final answer-synthesis LLM call (for result-verified eval runs). Eval
+    runs never record their queries as few-shot examples.
+    """
+    configurable = {"record_examples": False}
+    if routing_policy is not None:
+        configurable["routing_policy"] = routing_policy
+    if sql_only:
+        configurable["sql_only"] = True
+    return agent.with_config(configurable=configurable)
 
 
 """
@@ -243,6 +365,6 @@ agent = builder.compile()
 │ run_query │  ← ToolNode: executes the SQL query
 └─────┬─────┘
       │
-      └──────────► (loops back to generate_query)
+      └──────────► (loops back to generate_query; ends here in sql_only eval runs)
 
 """
\ No newline at end of file
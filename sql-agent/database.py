@@ -0,0 +1,123 @@
+"""SQL access for the agents: traced statements and optional columnar results."""
+import time
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Union
+
+from langchain_community.agent_toolkits import SQLDatabaseToolkit
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+from langchain_community.utilities import SQLDatabase
+from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.tools import BaseTool
+from sqlalchemy import text
+from sqlalchemy.engine import Result
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.expression import Executable
+
+from columnar import ColumnarResult
+from config import settings
+from telemetry import emit_span, sql_duration, sql_errors, sql_rows
+
+# Rows fetched per round trip when building columnar results
+FETCH_BATCH_ROWS = 10_000
+
+
+class SQLAgentDatabase(SQLDatabase):
+    """``SQLDatabase`` that emits a span and latency/row metrics per statement."""
+
+    def _traced(self, statement: str, execute: Callable[[], Any], count_rows: Callable[[Any], Optional[int]]) -> Any:
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            result = execute()
+        except Exception as e:
+            duration = time.perf_counter() - t0
+            sql_duration.observe(duration)
+            sql_errors.inc()
+            emit_span("execute", "sql", start, duration, error=e, statement=statement[:500])
+            raise
+        duration = time.perf_counter() - t0
+        sql_duration.observe(duration)
+        rows = count_rows(result)
+        if rows is not None:
+            sql_rows.observe(rows)
+        emit_span("execute", "sql", start, duration, statement=statement[:500], rows=rows)
+        return result
+
+    def _execute(
+        self,
+        command: Union[str, Executable],
+        fetch: Literal["all", "one", "cursor"] = "all",
+        *,
+        parameters: Optional[Dict[str, Any]] = None,
+        execution_options: Optional[Dict[str, Any]] = None,
+    ) -> Union[Sequence[Dict[str, Any]], Result]:
+        return self._traced(
+            str(command),
+            lambda: super(SQLAgentDatabase, self)._execute(
+                command, fetch, parameters=parameters, execution_options=execution_options
+            ),
+            lambda result: len(result) if isinstance(result, list) else None,
+        )
+
+    def run_columnar(self, command: str) -> ColumnarResult:
+        """Execute ``command`` and return its rows as one NumPy array per column.
+
+        Rows are fetched in batches of ``FETCH_BATCH_ROWS`` and folded into the
+        columns as they arrive, so the full row list is never materialized.
+        """
+
+        def execute() -> ColumnarResult:
+            with self._engine.connect() as connection:
+                cursor = connection.execute(text(command))
+                if not cursor.returns_rows:
+                    return ColumnarResult.from_rows([], [])
+                return ColumnarResult.from_batches(
+                    list(cursor.keys()),
+                    iter(lambda: cursor.fetchmany(FETCH_BATCH_ROWS), []),
+                    max_string_length=self._max_string_length,
+                    max_text_rows=settings.sql_text_max_rows,
+                )
+
+        return self._traced(command, execute, lambda result: result.num_rows)
+
+
+def execute_query(db: SQLDatabase, query: str) -> tuple[str, Optional[ColumnarResult]]:
+    """Run ``query`` for a tool call: (text for the LLM, columnar artifact or None).
+
+    Errors are returned as ``"Error: ..."`` text, like ``SQLDatabase.run_no_throw``.
+    """
+    if settings.sql_result_format != "columnar" or not isinstance(db, SQLAgentDatabase):
+        return str(db.run_no_throw(query)), None
+    try:
+        result = db.run_columnar(query)
+    except SQLAlchemyError as e:
+        return f"Error: {e}", None
+    return result.to_text(), result
+
+
+class ColumnarQuerySQLDatabaseTool(QuerySQLDatabaseTool):
+    """``sql_db_query`` that also attaches the columnar result as the tool artifact."""
+
+    response_format: Literal["content", "content_and_artifact"] = "content_and_artifact"
+
+    def _run(
+        self,
+        query: str,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> tuple[str, Optional[ColumnarResult]]:
+        """Execute the query, return the result text and the columnar batch."""
+        return execute_query(self.db, query)
+
+
+class SQLAgentToolkit(SQLDatabaseToolkit):
+    """SQL toolkit whose query tool returns columnar artifacts when enabled."""
+
+    def get_tools(self) -> List[BaseTool]:
+        tools = super().get_tools()
+        if settings.sql_result_format != "columnar":
+            return tools
+        return [
+            ColumnarQuerySQLDatabaseTool(db=self.db, description=t.description)
+            if t.name == "sql_db_query"
+            else t
+            for t in tools
+        ]
@@ -0,0 +1,131 @@
+"""Micro-benchmark: per-node framework overhead of the custom graph with a fake LLM.
+
+The fake model answers instantly, so the measured time is pure framework cost:
+message construction, tool binding, graph scheduling and SQLite execution.
+
+    python -m eval.bench_overhead --iterations 200
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ensure sql-agent root is on path when run as script
+_sql_agent_root = Path(__file__).resolve().parent.parent
+if str(_sql_agent_root) not in sys.path:
+    sys.path.insert(0, str(_sql_agent_root))
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+import llm
+from config import settings
+
+
+class FakeToolChatModel(FakeMessagesListChatModel):
+    """Fake chat model that binds tools the way real providers do (JSON schema conversion)."""
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        formatted = [convert_to_openai_tool(t) for t in tools]
+        return self.bind(tools=formatted, tool_choice=tool_choice, **kwargs)
+
+
+def _tool_call(name: str, args: dict) -> AIMessage:
+    return AIMessage(
+        content="",
+        tool_calls=[{"name": name, "args": args, "id": f"{name}_call", "type": "tool_call"}],
+    )
+
+
+def fake_model() -> FakeToolChatModel:
+    """One question = schema pick, query, check, final answer (responses cycle)."""
+    query = "SELECT Name FROM genres ORDER BY Name LIMIT 5"
+    return FakeToolChatModel(
+        responses=[
+            _tool_call("sql_db_schema", {"table_names": "genres"}),
+            _tool_call("sql_db_query", {"query": query}),
+            _tool_call("sql_db_query", {"query": query}),
+            AIMessage(content="Alternative, Blues, Bossa Nova, Classical, Comedy"),
+        ]
+    )
+
+
+def _per_call_us(fn, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def _report(label: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+    print(f"  {label:<34}{statistics.median(timings):>10.0f} µs{p95:>10.0f} µs")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", "-n", type=int, default=200)
+    args = parser.parse_args()
+
+    # Fake answers must never be recorded as few-shot examples
+    settings.few_shot_record_production = False
+    model = fake_model()
+    # Every node resolves its model through get_llm, so route all of them to the fake
+    llm._build_llm.cache_clear()
+    llm._build_llm = lambda _model_name: model
+
+    import custom_sql_agent as graph
+
+    question = [HumanMessage(content="What are all the genres?")]
+    state = graph.list_tables({"messages": question})
+    schema_state = {"messages": question + state["messages"]}
+    query_call = _tool_call("sql_db_query", {"query": "SELECT Name FROM genres LIMIT 5"})
+    check_state = {"messages": schema_state["messages"] + [query_call]}
+    config = {"configurable": {}}
+
+    print(f"Per-call framework overhead ({args.iterations} iterations)")
+    print(f"  {'step':<34}{'median':>13}{'p95':>13}")
+    _report(
+        "bind_tools (uncached)",
+        _per_call_us(lambda: model.bind_tools([graph.run_query_tool], tool_choice="any"), args.iterations),
+    )
+    _report(
+        "bind_tools_cached",
+        _per_call_us(
+            lambda: llm.bind_tools_cached(model, [graph.run_query_tool], tool_choice="any"),
+            args.iterations,
+        ),
+    )
+    _report(
+        "list_tables node",
+        _per_call_us(lambda: graph.list_tables({"messages": question}), args.iterations),
+    )
+    _report(
+        "call_get_schema node",
+        _per_call_us(lambda: graph.call_get_schema(schema_state, config), args.iterations),
+    )
+    _report(
+        "generate_query node",
+        _per_call_us(lambda: graph.generate_query(schema_state, config), args.iterations),
+    )
+    _report(
+        "check_query node",
+        _per_call_us(lambda: graph.check_query(check_state, config), args.iterations),
+    )
+
+    # Realign the fake's response cycle before whole-graph runs
+    model.i = 0
+    _report(
+        "full graph (one question)",
+        _per_call_us(lambda: graph.agent.invoke({"messages": question}), args.iterations),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark: time to first token with and without prompt-prefix reuse.
+
+Streams the custom graph's real message layouts (schema selection, query
+generation, query check) for each test question against the configured model,
+twice:
+
+- ``cold``: a unique nonce is put in front of every system prompt, so no
+  request can reuse a cached prefix;
+- ``cached``: the messages exactly as the graph sends them, sharing one static
+  system prefix across nodes and questions.
+
+The drop in time-to-first-token between the two is what prefix caching buys
+(Ollama KV-cache reuse, hosted implicit/explicit prompt caching). Tools are
+not bound so the first streamed chunk marks the end of prompt processing.
+Needs a running model server; set LLM_KEEP_ALIVE so Ollama keeps the model loaded.
+
+    python -m eval.bench_ttft --questions 10
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Ensure sql-agent root is on path when run as script
+_sql_agent_root = Path(__file__).resolve().parent.parent
+if str(_sql_agent_root) not in sys.path:
+    sys.path.insert(0, str(_sql_agent_root))
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from eval.test_cases import TEST_CASES
+
+
+def _bust_prefix(messages: list[BaseMessage]) -> list[BaseMessage]:
+    """Same messages with a unique first line, so no cached prefix matches."""
+    first, *rest = messages
+    nonce = f"[request {uuid.uuid4().hex}]\n"
+    return [SystemMessage(content=nonce + first.content), *rest]
+
+
+def _ttft_ms(model, messages: list[BaseMessage]) -> float:
+    start = time.perf_counter()
+    for _ in model.stream(messages):
+        break
+    return (time.perf_counter() - start) * 1000
+
+
+def node_requests(graph, test_case: dict) -> dict[str, list[BaseMessage]]:
+    """The messages each LLM node would send early in a run for this question."""
+    question = HumanMessage(content=test_case["question"])
+    history = [question, *graph.list_tables({"messages": [question]})["messages"]]
+    query = test_case.get("expected_sql") or "SELECT 1"
+    return {
+        "schema": [graph.get_schema_system_message, *history],
+        "query": graph.generate_query_messages(history),
+        "check": graph.check_query_messages(query),
+    }
+
+
+def _report(label: str, cold: list[float], cached: list[float]) -> None:
+    cold_ms, cached_ms = statistics.median(cold), statistics.median(cached)
+    drop = (1 - cached_ms / cold_ms) * 100 if cold_ms else 0.0
+    print(f"  {label:<10}{cold_ms:>12.1f} ms{cached_ms:>12.1f} ms{drop:>10.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", "-n", type=int, default=10)
+    parser.add_argument(
+        "--fake-llm",
+        action="store_true",
+        help="Use the instant fake model (checks the harness, not the cache).",
+    )
+    args = parser.parse_args()
+
+    if args.fake_llm:
+        from eval.workers import use_fake_llm
+
+        use_fake_llm()
+    import custom_sql_agent as graph
+    from llm import get_llm
+
+    model = get_llm()
+    requests = [node_requests(graph, tc) for tc in TEST_CASES[: args.questions]]
+    # One untimed request loads the model so the first cold sample is not a load
+    _ttft_ms(model, _bust_prefix(requests[0]["schema"]))
+
+    timings: dict[str, dict[str, list[float]]] = {"cold": {}, "cached": {}}
+    for mode in ("cold", "cached"):
+        for per_node in requests:
+            # Interleave nodes as a graph run does
+            for node, messages in per_node.items():
+                if mode == "cold":
+                    messages = _bust_prefix(messages)
+                timings[mode].setdefault(node, []).append(_ttft_ms(model, messages))
+
+    print(f"Time to first token, {len(requests)} questions (median):")
+    print(f"  {'node':<10}{'cold':>15}{'cached':>15}{'drop':>11}")
+    for node in timings["cold"]:
+        _report(node, timings["cold"][node], timings["cached"][node])
+    _report(
+        "all",
+        [t for ts in timings["cold"].values() for t in ts],
+        [t for ts in timings["cached"].values() for t in ts],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -5,15 +5,16 @@ import time
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional
 
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
 
+from eval.ground_truth import GroundTruthCache
+from example_store import successful_queries
+from llm import is_parse_error
 
-def _is_parse_error(exc: BaseException) -> bool:
-    """True if the exception looks like a transient JSON/parsing error."""
-    msg = str(exc).lower()
-    return "object key string" in msg or "json" in msg
+if TYPE_CHECKING:
+    from eval.run_store import RunStore
 
 
 @dataclass
@@ -28,6 +29,10 @@ class EvalResult:
     error: Optional[str] = None
     error_debug: Optional[str] = None
     latency_ms: float = 0.0
+    escalated: bool = False
+    executed_sql: Optional[str] = None
+    sql_correct: Optional[bool] = None  # None when the case has no expected_sql
+    cached: bool = False  # reused from the run store instead of re-run
 
 
 @dataclass
@@ -38,16 +43,41 @@ class EvalSummary:
     passed: int = 0
     failed: int = 0
     answer_accuracy: float = 0.0
+    sql_accuracy: float = 0.0
     avg_latency_ms: float = 0.0
+    escalation_rate: float = 0.0
+    cached: int = 0
     by_category: dict = field(default_factory=dict)
 
 
 class SQLAgentEvaluator:
-    """Evaluates the SQL agent against a set of test cases."""
-
-    def __init__(self, agent: Any, db: Any = None):
+    """Evaluates the SQL agent against a set of test cases.
+
+    With a database (or a ``GroundTruthCache``), cases that define
+    ``expected_sql`` also get ``sql_correct``: the agent's last executed query
+    is compared to the ground-truth result set. With ``fast=True`` that check
+    alone decides pass/fail and the final answer text is not inspected (pair
+    it with an agent that stops after the SQL step).
+
+    With a ``RunStore``, cases whose fingerprint is unchanged reuse their
+    stored result and every fresh result is recorded.
+    """
+
+    def __init__(
+        self,
+        agent: Any,
+        db: Any = None,
+        ground_truth: Optional[GroundTruthCache] = None,
+        fast: bool = False,
+        run_store: Optional["RunStore"] = None,
+    ):
         self.agent = agent
         self.db = db
+        if ground_truth is None and db is not None:
+            ground_truth = GroundTruthCache(db)
+        self.ground_truth = ground_truth
+        self.fast = fast
+        self.run_store = run_store
         self.results: list[EvalResult] = []
 
     def _get_final_response_text(self, messages: list[BaseMessage]) -> str:
@@ -73,7 +103,11 @@ class SQLAgentEvaluator:
         return all(val.lower() in response_lower for val in expected)
 
     async def run_single_test(self, test_case: dict) -> EvalResult:
-        """Run a single test case and return the result. Retries once on JSON/parse errors."""
+        """Run a single test case and return the result.
+
+        Transient LLM failures (including JSON/parse errors) are retried inside
+        the graph by the failing node only, so the agent is invoked once here.
+        """
         result = EvalResult(
             test_id=test_case["id"],
             question=test_case["question"],
@@ -81,43 +115,49 @@ class SQLAgentEvaluator:
         )
 
         start = time.perf_counter()
-        last_exception = None
-        for attempt in range(2):
-            try:
-                response = await self.agent.ainvoke(
-                    {"messages": [HumanMessage(content=test_case["question"])]}
+        try:
+            response = await self.agent.ainvoke(
+                {"messages": [HumanMessage(content=test_case["question"])]}
+            )
+
+            result.latency_ms = (time.perf_counter() - start) * 1000
+
+            result.escalated = bool(response.get("escalated", False))
+            messages = response.get("messages", [])
+            queries = successful_queries(messages)
+            result.executed_sql = queries[-1] if queries else None
+            expected_sql = test_case.get("expected_sql")
+            if expected_sql and self.ground_truth is not None:
+                result.sql_correct = self.ground_truth.check(
+                    expected_sql,
+                    result.executed_sql,
+                    test_case.get("result_match", "exact"),
                 )
 
-                result.latency_ms = (time.perf_counter() - start) * 1000
+            if self.fast:
+                if result.sql_correct is None:
+                    result.error = "fast mode requires expected_sql and a database"
+                result.passed = bool(result.sql_correct)
+                return result
 
-                messages = response.get("messages", [])
-                final_message = self._get_final_response_text(messages)
-                result.agent_response = final_message
+            final_message = self._get_final_response_text(messages)
+            result.agent_response = final_message
 
-                if test_case.get("expected_answer_contains"):
-                    result.answer_correct = self.check_answer_contains(
-                        final_message, test_case["expected_answer_contains"]
-                    )
-                else:
-                    result.answer_correct = True
+            if test_case.get("expected_answer_contains"):
+                result.answer_correct = self.check_answer_contains(
+                    final_message, test_case["expected_answer_contains"]
+                )
+            else:
+                result.answer_correct = True
 
-                result.passed = result.answer_correct
-                return result
+            result.passed = result.answer_correct
 
-            except Exception as e:
-                last_exception = e
-                result.latency_ms = (time.perf_counter() - start) * 1000
-                result.error = str(e)
-                if _is_parse_error(e):
-                    result.error_debug = "json_parse"
-                    if attempt == 0:
-                        continue
-                break
-
-        if last_exception is not None:
-            result.error = str(last_exception)
-            if _is_parse_error(last_exception):
+        except Exception as e:
+            result.latency_ms = (time.perf_counter() - start) * 1000
+            result.error = str(e)
+            if is_parse_error(e):
                 result.error_debug = "json_parse"
+
         return result
 
     async def run_all_tests(
@@ -127,20 +167,33 @@ class SQLAgentEvaluator:
         self.results = []
 
         for tc in test_cases:
-            result = await self.run_single_test(tc)
-            self.results.append(result)
-            if verbose:
-                status = "PASS" if result.passed else "FAIL"
-                short_q = (tc["question"][:50] + "…") if len(tc["question"]) > 50 else tc["question"]
-                print(f"  [{status}] {tc['id']}: {short_q}")
+            result = self.run_store.get(tc) if self.run_store else None
+            if result is None:
+                result = await self.run_single_test(tc)
+            self.add_result(tc, result, verbose)
 
         return self.compute_summary(test_cases)
 
+    def add_result(self, test_case: dict, result: EvalResult, verbose: bool = True) -> None:
+        """Collect one result (recording fresh ones in the run store) and print it."""
+        if self.run_store and not result.cached:
+            self.run_store.put(test_case, result)
+        self.results.append(result)
+        if verbose:
+            status = "PASS" if result.passed else "FAIL"
+            q = test_case["question"]
+            short_q = (q[:50] + "…") if len(q) > 50 else q
+            suffix = " (cached)" if result.cached else ""
+            print(f"  [{status}] {test_case['id']}: {short_q}{suffix}")
+
     def compute_summary(self, test_cases: list[dict]) -> EvalSummary:
         """Compute evaluation metrics from results."""
         summary = EvalSummary(total=len(self.results))
 
         answer_correct_count = 0
+        sql_checked_count = 0
+        sql_correct_count = 0
+        escalated_count = 0
         total_latency = 0.0
         category_stats: dict[str, dict] = {}
 
@@ -152,6 +205,13 @@ class SQLAgentEvaluator:
 
             if result.answer_correct:
                 answer_correct_count += 1
+            if result.sql_correct is not None:
+                sql_checked_count += 1
+                sql_correct_count += result.sql_correct
+            if result.escalated:
+                escalated_count += 1
+            if result.cached:
+                summary.cached += 1
 
             total_latency += result.latency_ms
 
@@ -165,20 +225,29 @@ class SQLAgentEvaluator:
         summary.answer_accuracy = (
             answer_correct_count / summary.total if summary.total > 0 else 0.0
         )
+        summary.sql_accuracy = (
+            sql_correct_count / sql_checked_count if sql_checked_count > 0 else 0.0
+        )
         summary.avg_latency_ms = (
             total_latency / summary.total if summary.total > 0 else 0.0
         )
+        summary.escalation_rate = (
+            escalated_count / summary.total if summary.total > 0 else 0.0
+        )
         summary.by_category = category_stats
 
         return summary
 
-    def export_results(self, filepath: str | Path) -> None:
-        """Export results to JSON for analysis."""
+    def export_results(
+        self, filepath: str | Path, metadata: Optional[dict] = None
+    ) -> None:
+        """Export results to JSON for analysis, with optional run metadata."""
         filepath = Path(filepath)
         filepath.parent.mkdir(parents=True, exist_ok=True)
 
         data = {
             "timestamp": datetime.now().isoformat(),
+            "metadata": metadata or {},
             "summary": {
                 "total": len(self.results),
                 "passed": sum(1 for r in self.results if r.passed),
@@ -190,10 +259,14 @@ class SQLAgentEvaluator:
                     "question": r.question,
                     "passed": r.passed,
                     "answer_correct": r.answer_correct,
+                    "sql_correct": r.sql_correct,
                     "agent_response": r.agent_response,
                     "error": r.error,
                     "error_debug": r.error_debug,
                     "latency_ms": r.latency_ms,
+                    "escalated": r.escalated,
+                    "executed_sql": r.executed_sql,
+                    "cached": r.cached,
                 }
                 for r in self.results
             ],
@@ -0,0 +1,231 @@
+"""Ground-truth SQL results, fingerprinted once and compared set-wise.
+
+A result fingerprint keeps every row as a tuple of hashed values plus, per
+column, a digest of the sorted value multiset. Comparison ignores row and
+column order and tolerates extra columns in the agent's result: each
+ground-truth column is matched to a distinct agent column (by digest, or by
+value subset), then the rows projected onto the matched columns are compared
+as multisets, so values must still belong to the same rows:
+
+- ``exact``: the projected agent rows equal the ground-truth rows.
+- ``subset``: the agent returned a non-empty part of the answer (e.g. the
+  prompt's default LIMIT): its projected rows are a sub-multiset of them.
+"""
+
+import hashlib
+import json
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from telemetry import record_cache
+
+MATCH_MODES = ("exact", "subset")
+
+
+def _normalize_value(value: Any) -> str:
+    if value is None:
+        return "\0null"
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, float):
+        if value.is_integer():
+            return str(int(value))
+        return repr(round(value, 4))
+    if isinstance(value, bytes):
+        return value.hex()
+    return str(value).strip().casefold()
+
+
+def _hash_value(value: Any) -> str:
+    return hashlib.blake2b(_normalize_value(value).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _assignments(
+    candidates: list[list[int]], used: frozenset = frozenset()
+) -> Iterator[tuple[int, ...]]:
+    """Injective choices of one candidate agent column per ground-truth column."""
+    if not candidates:
+        yield ()
+        return
+    first, rest = candidates[0], candidates[1:]
+    for column in first:
+        if column not in used:
+            for tail in _assignments(rest, used | {column}):
+                yield (column, *tail)
+
+
+@dataclass(frozen=True)
+class ResultFingerprint:
+    """Order-insensitive hashed summary of a query result."""
+
+    num_rows: int
+    column_digests: tuple[str, ...]
+    rows: tuple[tuple[str, ...], ...]  # hashed values per row, sorted
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Any]]) -> "ResultFingerprint":
+        hashed = sorted(tuple(_hash_value(v) for v in row) for row in rows)
+        digests = [
+            hashlib.sha256("".join(sorted(column)).encode()).hexdigest()[:16]
+            for column in zip(*hashed)
+        ]
+        return cls(len(hashed), tuple(digests), tuple(hashed))
+
+    @cached_property
+    def column_values(self) -> tuple[frozenset, ...]:
+        return tuple(frozenset(column) for column in zip(*self.rows))
+
+    def to_dict(self) -> dict:
+        return {
+            "num_rows": self.num_rows,
+            "column_digests": list(self.column_digests),
+            "rows": [list(row) for row in self.rows],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ResultFingerprint":
+        return cls(
+            data["num_rows"],
+            tuple(data["column_digests"]),
+            tuple(tuple(row) for row in data["rows"]),
+        )
+
+    def _projected(self, columns: tuple[int, ...]) -> Counter:
+        return Counter(tuple(row[c] for c in columns) for row in self.rows)
+
+    def _any_assignment(
+        self,
+        actual: "ResultFingerprint",
+        candidate: Callable[[int, int], bool],
+        rows_match: Callable[[Counter, Counter], bool],
+    ) -> bool:
+        candidates = [
+            [a for a in range(len(actual.column_digests)) if candidate(e, a)]
+            for e in range(len(self.column_digests))
+        ]
+        if not all(candidates):
+            return False
+        expected = self._projected(tuple(range(len(self.column_digests))))
+        return any(
+            rows_match(actual._projected(columns), expected)
+            for columns in _assignments(candidates)
+        )
+
+    def matches(self, actual: "ResultFingerprint", mode: str = "exact") -> bool:
+        """True if ``actual`` (the agent's result) answers this ground truth."""
+        if mode == "subset":
+            if not 0 < actual.num_rows <= self.num_rows:
+                return False
+            return self._any_assignment(
+                actual,
+                lambda e, a: actual.column_values[a] <= self.column_values[e],
+                lambda got, want: all(want[row] >= n for row, n in got.items()),
+            )
+        if actual.num_rows != self.num_rows:
+            return False
+        if self.num_rows == 0:
+            return True
+        return self._any_assignment(
+            actual,
+            lambda e, a: actual.column_digests[a] == self.column_digests[e],
+            lambda got, want: got == want,
+        )
+
+
+def database_key(db: Any) -> str:
+    """Identify the database contents by file path, size and mtime (read-only DB)."""
+    database = getattr(db._engine.url, "database", "") or ""
+    path = Path(database.removeprefix("file:").split("?")[0])
+    if path.exists():
+        stat = path.stat()
+        return f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+    return str(db._engine.url)
+
+
+class GroundTruthCache:
+    """Fingerprints SQL results against one database, each statement executed once.
+
+    With ``path`` set, ground-truth fingerprints persist across runs, keyed by
+    the database file's identity so a changed database invalidates them. The
+    agent's own queries are fingerprinted in memory only and never saved.
+    """
+
+    def __init__(self, db: Any, path: Optional[str | Path] = None):
+        self.db = db
+        self.path = Path(path) if path else None
+        self._db_key = database_key(db)
+        self._lock = threading.Lock()
+        self._fingerprints: dict[str, ResultFingerprint] = {}
+        self._agent_fingerprints: dict[str, ResultFingerprint] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self) -> None:
+        if not (self.path and self.path.exists()):
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        for sql, fp in data.get(self._db_key, {}).items():
+            if "rows" in fp:  # entries in an older format are recomputed
+                self._fingerprints[sql] = ResultFingerprint.from_dict(fp)
+
+    def save(self) -> None:
+        """Persist fingerprints for this database (other databases' entries are kept)."""
+        if not self.path:
+            return
+        data: dict = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+        with self._lock:
+            data[self._db_key] = {sql: fp.to_dict() for sql, fp in self._fingerprints.items()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(data), encoding="utf-8")
+
+    def fingerprint(self, sql: str, persist: bool = True) -> ResultFingerprint:
+        """Fingerprint of ``sql``'s result, executing it only on first use.
+
+        Only ``persist=True`` (ground-truth) fingerprints are written by ``save``.
+        Raises ``SQLAlchemyError`` if the statement fails.
+        """
+        key = " ".join(sql.strip().rstrip(";").split())
+        with self._lock:
+            cached = self._fingerprints.get(key) or self._agent_fingerprints.get(key)
+        record_cache("ground_truth", cached is not None)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        with self.db._engine.connect() as connection:
+            rows = connection.execute(text(sql)).fetchall()
+        fp = ResultFingerprint.from_rows(rows)
+        with self._lock:
+            (self._fingerprints if persist else self._agent_fingerprints)[key] = fp
+        return fp
+
+    def prime(self, statements: Iterable[str]) -> None:
+        """Fingerprint all ground-truth statements up front."""
+        for sql in statements:
+            self.fingerprint(sql)
+
+    def check(self, expected_sql: str, actual_sql: Optional[str], mode: str = "exact") -> bool:
+        """True if ``actual_sql`` returns the same result set as ``expected_sql``."""
+        if not actual_sql:
+            return False
+        try:
+            actual = self.fingerprint(actual_sql, persist=False)
+        except SQLAlchemyError:
+            return False
+        return self.fingerprint(expected_sql).matches(actual, mode)
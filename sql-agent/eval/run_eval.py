@@ -3,6 +3,8 @@
 import argparse
 import asyncio
 import sys
+import time
+from dataclasses import replace
 from pathlib import Path
 
 # Ensure sql-agent root is on path when run as script
@@ -10,9 +12,19 @@ _sql_agent_root = Path(__file__).resolve().parent.parent
 if str(_sql_agent_root) not in sys.path:
     sys.path.insert(0, str(_sql_agent_root))
 
-from eval.evaluator import SQLAgentEvaluator
+from config import ROUTING_POLICIES, settings
+from eval.evaluator import EvalSummary, SQLAgentEvaluator
+from eval.ground_truth import GroundTruthCache
+from eval.run_store import RunStore, config_fingerprint
+from eval.synthetic import load_cases
 from eval.test_cases import TEST_CASES
-from sql_agent import db, get_eval_agent
+from eval.workers import WorkerConfig, run_sharded, use_fake_llm
+from example_store import get_example_store, get_example_store_path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 
 def parse_args() -> argparse.Namespace:
@@ -38,39 +50,139 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Suppress per-test progress output.",
     )
+    parser.add_argument(
+        "--routing-policy",
+        nargs="+",
+        choices=ROUTING_POLICIES,
+        default=None,
+        help=(
+            "Evaluate the custom graph under one or more model routing policies "
+            "and compare their latency/accuracy (e.g. --routing-policy single escalate)."
+        ),
+    )
+    parser.add_argument(
+        "--seed-examples",
+        action="store_true",
+        help=(
+            "Add the executed SQL of test cases whose result matched their expected_sql "
+            "to the few-shot example store (cases without expected_sql are skipped)."
+        ),
+    )
+    parser.add_argument(
+        "--database",
+        type=Path,
+        default=None,
+        help="SQLite database to evaluate against instead of SQLITE_DATABASE (e.g. a synthetic one).",
+    )
+    parser.add_argument(
+        "--cases",
+        type=Path,
+        default=None,
+        help="Load test cases from a questions JSON file written by eval.synthetic.",
+    )
+    parser.add_argument(
+        "--fast",
+        action="store_true",
+        help=(
+            "Score only the SQL step against each case's expected_sql result set; "
+            "the custom graph stops after the query runs, skipping answer synthesis."
+        ),
+    )
+    parser.add_argument(
+        "--ground-truth-cache",
+        type=Path,
+        default=Path("eval_results/ground_truth_cache.json"),
+        help="Where ground-truth result fingerprints are cached between runs.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Reuse stored results of cases whose fingerprint (case, prompts, model settings, "
+            "schema, tools, few-shot store) is unchanged; only the rest are re-run."
+        ),
+    )
+    parser.add_argument(
+        "--run-store",
+        type=Path,
+        default=Path("eval_results/run_store.json"),
+        help="Where per-case results are stored for --incremental and run-to-run diffs.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Run test cases across this many processes, each with its own agent and DB connection.",
+    )
+    parser.add_argument(
+        "--fake-llm",
+        action="store_true",
+        help=(
+            "Use the instant fake model from eval.bench_overhead instead of a real one, "
+            "to measure harness/framework throughput (answers are not meaningful)."
+        ),
+    )
     return parser.parse_args()
 
 
-async def main() -> None:
-    args = parse_args()
+def seed_examples(evaluator: SQLAgentEvaluator) -> int:
+    """Store (question, SQL) pairs whose result was verified; returns how many were new.
 
-    test_cases = TEST_CASES
-    if args.category:
-        test_cases = [tc for tc in TEST_CASES if tc.get("category") == args.category]
-        if not test_cases:
-            print(f"No test cases found for category: {args.category}")
-            sys.exit(1)
-        print(f"Running {len(test_cases)} tests in category: {args.category}")
-    else:
-        print(f"Running all {len(test_cases)} tests")
+    Only ``sql_correct`` counts: ``passed`` can come from a substring match on
+    the answer text (or from a case with no expectations at all).
+    """
+    store = get_example_store()
+    added = 0
+    for result in evaluator.results:
+        if result.sql_correct is True and result.executed_sql:
+            added += store.add(result.question, result.executed_sql, source="eval")
+    return added
 
-    print("=" * 60)
-    print("SQL Agent Evaluation")
-    print("=" * 60)
 
-    agent = get_eval_agent()
-    evaluator = SQLAgentEvaluator(agent, db)
-    summary = await evaluator.run_all_tests(test_cases, verbose=not args.quiet)
+def _peak_rss_mb() -> float | None:
+    """Peak resident memory of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
 
-    print("\n" + "=" * 60)
-    print("SUMMARY")
-    print("=" * 60)
+
+def run_metadata(database: Path, wall_s: float, workers: int = 1) -> dict:
+    """Database size and process cost for latency/memory-vs-scale comparisons."""
+    return {
+        "database": str(database),
+        "database_mb": round(database.stat().st_size / 2**20, 2) if database.exists() else None,
+        "wall_s": round(wall_s, 2),
+        "workers": workers,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+async def run_tests(
+    evaluator: SQLAgentEvaluator,
+    test_cases: list[dict],
+    args: argparse.Namespace,
+    worker_config: WorkerConfig,
+) -> EvalSummary:
+    """Run in this process, or sharded over ``--workers`` processes."""
+    if args.workers > 1:
+        return await run_sharded(
+            evaluator, test_cases, args.workers, worker_config, verbose=not args.quiet
+        )
+    return await evaluator.run_all_tests(test_cases, verbose=not args.quiet)
+
+
+def print_summary(summary: EvalSummary) -> None:
+    """Print the summary block for one evaluation run."""
     print(f"Total tests:      {summary.total}")
     if summary.total > 0:
         pct = summary.passed / summary.total * 100
         print(f"Passed:           {summary.passed} ({pct:.1f}%)")
     print(f"Failed:           {summary.failed}")
+    if summary.cached:
+        print(f"Reused (cached):  {summary.cached}")
     print(f"Answer accuracy: {summary.answer_accuracy * 100:.1f}%")
+    print(f"SQL accuracy:    {summary.sql_accuracy * 100:.1f}%")
     print(f"Avg latency:     {summary.avg_latency_ms:.0f} ms")
 
     print("\nBy category:")
@@ -80,11 +192,173 @@ async def main() -> None:
         pct = passed / total * 100 if total > 0 else 0
         print(f"  {cat}: {passed}/{total} ({pct:.0f}%)")
 
+
+def print_run_diff(store: RunStore, evaluator: SQLAgentEvaluator) -> None:
+    """Print pass/fail flips and the latency change of re-run cases vs. the previous run."""
+    changes = store.diff(evaluator.results)
+    if not changes:
+        return
+    print("\nChanges since previous run:")
+    flips = [c for c in changes if c["passed"] != c["was_passed"]]
+    for c in flips:
+        before, after = ("PASS" if c["was_passed"] else "FAIL"), ("PASS" if c["passed"] else "FAIL")
+        print(f"  {c['test_id']}: {before} -> {after}")
+    if not flips:
+        print("  no pass/fail changes")
+    old = sum(c["was_latency_ms"] for c in changes) / len(changes)
+    new = sum(c["latency_ms"] for c in changes) / len(changes)
+    print(f"  avg latency of {len(changes)} re-run cases: {old:.0f} ms -> {new:.0f} ms ({new - old:+.0f} ms)")
+
+
+def print_routing_comparison(summaries: dict[str, EvalSummary]) -> None:
+    """Print the latency/accuracy trade-off of each routing policy side by side."""
+    print("\n" + "=" * 60)
+    print("ROUTING POLICIES")
+    print("=" * 60)
+    print(f"{'policy':<12}{'accuracy':>10}{'sql acc':>10}{'avg latency':>14}{'escalated':>12}")
+    for policy, summary in summaries.items():
+        print(
+            f"{policy:<12}"
+            f"{summary.answer_accuracy * 100:>9.1f}%"
+            f"{summary.sql_accuracy * 100:>9.1f}%"
+            f"{summary.avg_latency_ms:>11.0f} ms"
+            f"{summary.escalation_rate * 100:>11.1f}%"
+        )
+
+
+async def main() -> None:
+    args = parse_args()
+    # Only verified (passing) eval queries may enter the example store
+    settings.few_shot_record_production = False
+
+    if args.database:
+        # Must happen before the agent modules connect at import time
+        settings.sqlite_database = str(args.database.resolve())
+    database = (_sql_agent_root / settings.sqlite_database).resolve()
+    if args.fake_llm:
+        use_fake_llm()
+    from sql_agent import db, get_eval_agent
+
+    all_cases = load_cases(args.cases) if args.cases else TEST_CASES
+    test_cases = all_cases
+    if args.category:
+        test_cases = [tc for tc in all_cases if tc.get("category") == args.category]
+        if not test_cases:
+            print(f"No test cases found for category: {args.category}")
+            sys.exit(1)
+        print(f"Running {len(test_cases)} tests in category: {args.category}")
+    else:
+        print(f"Running all {len(test_cases)} tests")
+
+    if args.fast:
+        test_cases = [tc for tc in test_cases if tc.get("expected_sql")]
+        print(f"Fast mode: scoring the SQL step of {len(test_cases)} tests with expected_sql")
+
     out_path = args.output
     if not out_path.is_absolute():
         out_path = _sql_agent_root / out_path
-    evaluator.export_results(out_path)
+    cache_path = args.ground_truth_cache
+    if not cache_path.is_absolute():
+        cache_path = _sql_agent_root / cache_path
+    if not args.run_store.is_absolute():
+        args.run_store = _sql_agent_root / args.run_store
+
+    ground_truth = GroundTruthCache(db, cache_path)
+    ground_truth.prime(tc["expected_sql"] for tc in test_cases if tc.get("expected_sql"))
+    ground_truth.save()  # workers load the primed fingerprints
+    worker_config = WorkerConfig(
+        database=str(database),
+        fast=args.fast,
+        ground_truth_cache=str(cache_path),
+        fake_llm=args.fake_llm,
+    )
+    start = time.perf_counter()
+
+    if args.routing_policy or args.fast:
+        import custom_sql_agent
+
+        summaries: dict[str, EvalSummary] = {}
+        for policy in args.routing_policy or [None]:
+            label = policy or settings.llm_routing_policy
+            print("=" * 60)
+            print(f"SQL Agent Evaluation (routing policy: {label}{', fast' if args.fast else ''})")
+            print("=" * 60)
+
+            start = time.perf_counter()
+            fingerprint = config_fingerprint(
+                custom_sql_agent.system_prompts,
+                [*custom_sql_agent.tools, custom_sql_agent.run_query_tool],
+                custom_sql_agent.db,
+                get_example_store_path(),
+                routing_policy=label,
+                fast=args.fast,
+            )
+            scope = f"{database.name}:custom_sql_agent:{label}{':fast' if args.fast else ''}"
+            store = RunStore(args.run_store, scope, fingerprint, reuse=args.incremental)
+            evaluator = SQLAgentEvaluator(
+                custom_sql_agent.get_eval_agent(policy, sql_only=args.fast),
+                custom_sql_agent.db,
+                ground_truth=ground_truth,
+                fast=args.fast,
+                run_store=store,
+            )
+            summary = await run_tests(
+                evaluator,
+                test_cases,
+                args,
+                replace(worker_config, agent="custom_sql_agent", routing_policy=policy),
+            )
+            summaries[label] = summary
+            store.save()
+
+            print()
+            print_summary(summary)
+            print_run_diff(store, evaluator)
+            policy_path = out_path
+            if args.routing_policy:
+                policy_path = out_path.with_name(f"{out_path.stem}_{policy}{out_path.suffix}")
+            metadata = run_metadata(database, time.perf_counter() - start, args.workers)
+            evaluator.export_results(
+                policy_path, metadata={"routing_policy": label, "fast": args.fast, **metadata}
+            )
+            print(f"\nDetailed results exported to {policy_path}\n")
+            if args.seed_examples:
+                print(f"Seeded {seed_examples(evaluator)} new few-shot examples\n")
+
+        ground_truth.save()
+        if len(summaries) > 1:
+            print_routing_comparison(summaries)
+        return
+
+    print("=" * 60)
+    print("SQL Agent Evaluation")
+    print("=" * 60)
+
+    import sql_agent
+
+    fingerprint = config_fingerprint(
+        [sql_agent.system_prompt], sql_agent.tools, db, get_example_store_path()
+    )
+    store = RunStore(args.run_store, f"{database.name}:sql_agent", fingerprint, reuse=args.incremental)
+    agent = get_eval_agent()
+    evaluator = SQLAgentEvaluator(agent, db, ground_truth=ground_truth, run_store=store)
+    summary = await run_tests(evaluator, test_cases, args, worker_config)
+    store.save()
+
+    print("\n" + "=" * 60)
+    print("SUMMARY")
+    print("=" * 60)
+    print_summary(summary)
+    print_run_diff(store, evaluator)
+
+    ground_truth.save()
+    metadata = run_metadata(database, time.perf_counter() - start, args.workers)
+    print(f"Database:        {database.name} ({metadata['database_mb']} MB)")
+    print(f"Peak memory:     {metadata['peak_rss_mb'] or 0:.0f} MB")
+    evaluator.export_results(out_path, metadata=metadata)
     print(f"\nDetailed results exported to {out_path}")
+    if args.seed_examples:
+        print(f"Seeded {seed_examples(evaluator)} new few-shot examples")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,150 @@
+"""Persisted eval results keyed by test id, for incremental re-runs.
+
+Every stored result carries a fingerprint of everything that can change its
+outcome: the test case itself, the agent's prompt text, the model/routing
+settings, the database schema and contents, the tool definitions and the
+few-shot example store. A later run reuses a stored result only when that
+fingerprint is unchanged, so editing one prompt re-runs every case while
+editing one test case re-runs only that case.
+"""
+
+import dataclasses
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from sqlalchemy import text
+
+from config import settings
+from eval.evaluator import EvalResult
+from eval.ground_truth import database_key
+
+# Settings that change agent behaviour (secrets, transport and telemetry excluded)
+FINGERPRINT_SETTINGS = (
+    "llm_provider",
+    "llm_model",
+    "llm_temperature",
+    "llm_routing_policy",
+    "llm_schema_model",
+    "llm_query_model",
+    "llm_check_model",
+    "llm_escalation_model",
+    "sql_result_format",
+    "sql_text_max_rows",
+    "few_shot_enabled",
+    "few_shot_k",
+    "few_shot_min_score",
+)
+
+
+def _digest(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+def _file_digest(path: Path) -> Optional[str]:
+    if not path.exists():
+        return None
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+
+
+def schema_version(db: Any) -> str:
+    """Digest of the database DDL plus the file identity of its contents."""
+    with db._engine.connect() as connection:
+        ddl = connection.execute(
+            text("SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL ORDER BY type, name")
+        ).fetchall()
+    return _digest({"ddl": [list(row) for row in ddl], "contents": database_key(db)})
+
+
+def config_fingerprint(
+    prompts: Iterable[str],
+    tools: Iterable[BaseTool],
+    db: Any,
+    example_store_path: Optional[Path] = None,
+    **extra: Any,
+) -> str:
+    """Fingerprint of the agent configuration shared by every test case in a run."""
+    return _digest(
+        {
+            "prompts": list(prompts),
+            "settings": {name: getattr(settings, name) for name in FINGERPRINT_SETTINGS},
+            "schema": schema_version(db),
+            "tools": [convert_to_openai_tool(t) for t in tools],
+            "examples": _file_digest(example_store_path) if example_store_path else None,
+            "extra": extra,
+        }
+    )
+
+
+class RunStore:
+    """JSON store of the latest result per (scope, test id) with its fingerprint.
+
+    ``scope`` separates agents and modes (e.g. prebuilt vs. each routing
+    policy) that share one file. ``previous`` keeps the entries as loaded, so a
+    run can be diffed against the one before it after ``put`` overwrites them.
+    With ``reuse=False`` results are only recorded, never reused.
+    """
+
+    def __init__(self, path: str | Path, scope: str, config_fingerprint: str, reuse: bool = True):
+        self.path = Path(path)
+        self.scope = scope
+        self.config_fingerprint = config_fingerprint
+        self.reuse = reuse
+        self._data: dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                self._data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self._data = {}
+        self._entries: dict[str, dict] = self._data.setdefault(scope, {})
+        self.previous: dict[str, dict] = {k: dict(v) for k, v in self._entries.items()}
+
+    def fingerprint(self, test_case: dict) -> str:
+        return _digest({"config": self.config_fingerprint, "case": test_case})
+
+    def get(self, test_case: dict) -> Optional[EvalResult]:
+        """Stored result for ``test_case`` if its fingerprint is unchanged."""
+        if not self.reuse:
+            return None
+        entry = self._entries.get(test_case["id"])
+        if entry is None or entry["fingerprint"] != self.fingerprint(test_case):
+            return None
+        return EvalResult(**{**entry["result"], "cached": True})
+
+    def put(self, test_case: dict, result: EvalResult) -> None:
+        """Record ``result``; runs that raised (e.g. model server down) are not kept."""
+        if result.error:
+            return
+        self._entries[test_case["id"]] = {
+            "fingerprint": self.fingerprint(test_case),
+            "recorded_at": datetime.now().isoformat(),
+            "result": {**dataclasses.asdict(result), "cached": False},
+        }
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._data, indent=2), encoding="utf-8")
+
+    def diff(self, results: Iterable[EvalResult]) -> list[dict]:
+        """Pass/fail and latency changes of re-run results against the previous run."""
+        changes = []
+        for result in results:
+            before = self.previous.get(result.test_id)
+            if result.cached or before is None:
+                continue
+            old = before["result"]
+            changes.append(
+                {
+                    "test_id": result.test_id,
+                    "was_passed": old["passed"],
+                    "passed": result.passed,
+                    "was_latency_ms": old["latency_ms"],
+                    "latency_ms": result.latency_ms,
+                }
+            )
+        return changes
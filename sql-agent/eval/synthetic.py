@@ -0,0 +1,418 @@
+"""Chinook-shaped synthetic databases and templated questions for scale testing.
+
+Each scale factor ``N`` copies every fact table of ``chinook.db`` ``N`` times
+with offset primary/foreign keys (copy ``n > 0`` suffixes artist, album and
+playlist names with ``#n``), so joins, distributions and the schema stay
+Chinook-like while row counts grow. Dimension tables (genres, media types,
+employees) are kept as-is. ``extra_tables`` adds small unrelated tables to
+widen the schema the agent has to choose from.
+
+Questions come from templates filled in from the generated data, with
+ground-truth SQL and answers computed against it, in the ``TEST_CASES`` format:
+
+    python -m eval.synthetic --scale 10 100 1000 --extra-tables 200 --questions 40
+    python -m eval.run_eval --database synthetic_data/chinook_x100_w200.db \\
+        --cases synthetic_data/chinook_x100_w200.questions.json --fast
+"""
+
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+# Ensure sql-agent root is on path when run as script
+_sql_agent_root = Path(__file__).resolve().parent.parent
+if str(_sql_agent_root) not in sys.path:
+    sys.path.insert(0, str(_sql_agent_root))
+
+SOURCE_DATABASE = _sql_agent_root / "chinook.db"
+
+# Column expressions per replicated table; ``{n}`` is the copy number and
+# ``{<table>}`` the source table's maximum id (the key offset per copy).
+_REPLICATED = {
+    "artists": {
+        "ArtistId": "ArtistId + n * {artists}",
+        "Name": "CASE WHEN n = 0 THEN Name ELSE Name || ' #' || n END",
+    },
+    "albums": {
+        "AlbumId": "AlbumId + n * {albums}",
+        "Title": "CASE WHEN n = 0 THEN Title ELSE Title || ' #' || n END",
+        "ArtistId": "ArtistId + n * {artists}",
+    },
+    "tracks": {
+        "TrackId": "TrackId + n * {tracks}",
+        "AlbumId": "AlbumId + n * {albums}",
+    },
+    "customers": {
+        "CustomerId": "CustomerId + n * {customers}",
+        "Email": "CASE WHEN n = 0 THEN Email ELSE n || '.' || Email END",
+    },
+    "invoices": {
+        "InvoiceId": "InvoiceId + n * {invoices}",
+        "CustomerId": "CustomerId + n * {customers}",
+    },
+    "invoice_items": {
+        "InvoiceLineId": "InvoiceLineId + n * {invoice_items}",
+        "InvoiceId": "InvoiceId + n * {invoices}",
+        "TrackId": "TrackId + n * {tracks}",
+    },
+    "playlists": {
+        "PlaylistId": "PlaylistId + n * {playlists}",
+        "Name": "CASE WHEN n = 0 THEN Name ELSE Name || ' #' || n END",
+    },
+    "playlist_track": {
+        "PlaylistId": "PlaylistId + n * {playlists}",
+        "TrackId": "TrackId + n * {tracks}",
+    },
+}
+_PRIMARY_KEYS = {
+    "artists": "ArtistId",
+    "albums": "AlbumId",
+    "tracks": "TrackId",
+    "customers": "CustomerId",
+    "invoices": "InvoiceId",
+    "invoice_items": "InvoiceLineId",
+    "playlists": "PlaylistId",
+}
+
+_EXTRA_TOPICS = ("audit", "campaign", "device", "review", "shipment", "ticket", "session", "coupon")
+_EXTRA_COLUMN_TYPES = ("INTEGER", "NVARCHAR(40)", "NUMERIC(10,2)", "DATETIME")
+
+
+def database_name(scale: int, extra_tables: int = 0) -> str:
+    """File stem for a synthetic database, e.g. ``chinook_x100_w200``."""
+    return f"chinook_x{scale}" + (f"_w{extra_tables}" if extra_tables else "")
+
+
+def _extra_table_name(i: int) -> str:
+    return f"{_EXTRA_TOPICS[i % len(_EXTRA_TOPICS)]}_log_{i:04d}"
+
+
+def _add_extra_tables(conn: sqlite3.Connection, count: int, rng: random.Random, rows: int = 20) -> None:
+    """Create ``count`` small tables with 4-12 columns each (schema-width load)."""
+    for i in range(count):
+        types = [rng.choice(_EXTRA_COLUMN_TYPES) for _ in range(rng.randint(3, 11))]
+        columns = [f"[Field{j}] {t}" for j, t in enumerate(types)]
+        table = _extra_table_name(i)
+        conn.execute(
+            f'CREATE TABLE "{table}" ([Id] INTEGER PRIMARY KEY NOT NULL, [CustomerId] INTEGER, '
+            + ", ".join(columns)
+            + ')'
+        )
+        values = []
+        for row in range(rows):
+            record = [row + 1, rng.randint(1, 59)]
+            for t in types:
+                if t == "INTEGER":
+                    record.append(rng.randint(0, 10_000))
+                elif t.startswith("NUMERIC"):
+                    record.append(round(rng.uniform(0, 100), 2))
+                elif t == "DATETIME":
+                    record.append(f"20{rng.randint(10, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 00:00:00")
+                else:
+                    record.append(f"{_EXTRA_TOPICS[i % len(_EXTRA_TOPICS)]}-{rng.randint(0, 999):03d}")
+            values.append(record)
+        placeholders = ", ".join("?" * (len(types) + 2))
+        conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})', values)
+
+
+def build_database(
+    path: str | Path,
+    scale: int = 10,
+    extra_tables: int = 0,
+    seed: int = 0,
+    source: str | Path = SOURCE_DATABASE,
+) -> Path:
+    """Write a Chinook-shaped database with ``scale`` copies of the fact tables.
+
+    An existing file at ``path`` is replaced.
+    """
+    if scale < 1:
+        raise ValueError(f"scale must be >= 1, got {scale}")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.unlink(missing_ok=True)
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("ATTACH DATABASE ? AS src", (f"file:{Path(source).resolve()}?mode=ro",))
+        schema = conn.execute(
+            "SELECT type, name, sql FROM src.sqlite_master "
+            "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'"
+        ).fetchall()
+        max_ids = {
+            table: conn.execute(f'SELECT MAX("{pk}") FROM src."{table}"').fetchone()[0]
+            for table, pk in _PRIMARY_KEYS.items()
+        }
+
+        # Tables first, indexes after the bulk load
+        for kind, _, sql in schema:
+            if kind == "table":
+                conn.execute(sql)
+        for kind, table, _ in schema:
+            if kind != "table":
+                continue
+            columns = [row[1] for row in conn.execute(f'PRAGMA src.table_info("{table}")')]
+            overrides = _REPLICATED.get(table)
+            if overrides is None:
+                conn.execute(f'INSERT INTO main."{table}" SELECT * FROM src."{table}"')
+                continue
+            select = ", ".join(
+                overrides[c].format(**max_ids) if c in overrides else f'"{c}"' for c in columns
+            )
+            conn.execute(
+                f"WITH RECURSIVE copies(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM copies WHERE n + 1 < ?) "
+                f'INSERT INTO main."{table}" SELECT {select} FROM copies, src."{table}" ORDER BY n',
+                (scale,),
+            )
+        for kind, _, sql in schema:
+            if kind == "index":
+                conn.execute(sql)
+
+        _add_extra_tables(conn, extra_tables, random.Random(seed))
+        conn.commit()
+        conn.execute("DETACH DATABASE src")
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+# --- Question templates ---
+# Each template draws parameters from the database and returns a test case
+# without its id, or None if the database has nothing to ask about.
+Template = Callable[[sqlite3.Connection, random.Random], Optional[dict]]
+
+_COUNTED_TABLES = {
+    "artists": "artists",
+    "albums": "albums",
+    "tracks": "tracks",
+    "customers": "customers",
+    "invoices": "invoices",
+    "employees": "employees",
+}
+
+
+def _scalar(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> object:
+    return conn.execute(sql, params).fetchone()[0]
+
+
+def _count(conn: sqlite3.Connection, sql: str) -> str:
+    """A count as the model writes it (and ``TEST_CASES`` expect it): ``"12,970"``."""
+    return f"{_scalar(conn, sql):,}"
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _count_rows(conn, rng):
+    table = rng.choice(list(_COUNTED_TABLES))
+    sql = f"SELECT COUNT(*) FROM {table}"
+    return {
+        "question": f"How many {_COUNTED_TABLES[table]} are there?",
+        "expected_answer_contains": [_count(conn, sql)],
+        "expected_sql": sql,
+        "category": "aggregation",
+    }
+
+
+def _albums_by_artist(conn, rng):
+    artist = conn.execute(
+        "SELECT ar.Name FROM artists ar JOIN albums al ON al.ArtistId = ar.ArtistId "
+        "GROUP BY ar.ArtistId HAVING COUNT(*) <= 5 ORDER BY random() LIMIT 1"
+    ).fetchone()
+    if artist is None:
+        return None
+    sql = (
+        "SELECT al.Title FROM albums al JOIN artists ar ON al.ArtistId = ar.ArtistId "
+        f"WHERE ar.Name = {_quote(artist[0])}"
+    )
+    titles = [row[0] for row in conn.execute(sql)]
+    return {
+        "question": f"List all albums by {artist[0]}.",
+        "expected_answer_contains": titles[:1],
+        "expected_sql": sql,
+        "category": "join",
+    }
+
+
+def _tracks_in_genre(conn, rng):
+    genres = [row[0] for row in conn.execute("SELECT Name FROM genres ORDER BY GenreId")]
+    genre = rng.choice(genres)
+    sql = (
+        "SELECT COUNT(*) FROM tracks t JOIN genres g ON t.GenreId = g.GenreId "
+        f"WHERE g.Name = {_quote(genre)}"
+    )
+    return {
+        "question": f"How many tracks are in the {genre} genre?",
+        "expected_answer_contains": [_count(conn, sql)],
+        "expected_sql": sql,
+        "category": "aggregation",
+    }
+
+
+def _customers_in_country(conn, rng):
+    countries = [row[0] for row in conn.execute("SELECT DISTINCT Country FROM customers ORDER BY Country")]
+    country = rng.choice(countries)
+    sql = f"SELECT FirstName, LastName FROM customers WHERE Country = {_quote(country)}"
+    first = conn.execute(sql).fetchone()
+    return {
+        "question": f"Which customers are from {country}?",
+        "expected_answer_contains": [first[0]],
+        "expected_sql": sql,
+        "result_match": "subset",
+        "category": "filter",
+    }
+
+
+def _long_tracks(conn, rng):
+    minutes = rng.randint(4, 10)
+    sql = f"SELECT COUNT(*) FROM tracks WHERE Milliseconds > {minutes * 60000}"
+    return {
+        "question": f"How many tracks are longer than {minutes} minutes?",
+        "expected_answer_contains": [_count(conn, sql)],
+        "expected_sql": sql,
+        "category": "filter",
+    }
+
+
+def _top_countries(conn, rng):
+    n = rng.randint(2, 5)
+    sql = (
+        "SELECT BillingCountry FROM invoices GROUP BY BillingCountry "
+        f"ORDER BY SUM(Total) DESC LIMIT {n}"
+    )
+    top = [row[0] for row in conn.execute(sql)]
+    return {
+        "question": f"Which {n} billing countries have the highest total sales?",
+        "expected_answer_contains": top,
+        "expected_sql": sql,
+        "category": "complex",
+    }
+
+
+def _extra_table_rows(conn, rng):
+    tables = [
+        row[0]
+        for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE '%\\_log\\_%' ESCAPE '\\'")
+    ]
+    if not tables:
+        return None
+    table = rng.choice(tables)
+    sql = f"SELECT COUNT(*) FROM {table}"
+    return {
+        "question": f"How many records are in the {table} table?",
+        "expected_answer_contains": [_count(conn, sql)],
+        "expected_sql": sql,
+        "category": "schema",
+    }
+
+
+TEMPLATES: tuple[Template, ...] = (
+    _count_rows,
+    _albums_by_artist,
+    _tracks_in_genre,
+    _customers_in_country,
+    _long_tracks,
+    _top_countries,
+    _extra_table_rows,
+)
+
+
+def generate_questions(path: str | Path, count: int = 40, seed: int = 0) -> list[dict]:
+    """Fill ``count`` questions round-robin from ``TEMPLATES`` (duplicates skipped)."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(f"file:{Path(path).resolve()}?mode=ro", uri=True)
+    # random() in template queries must be reproducible too
+    conn.create_function("random", 0, lambda: rng.getrandbits(63), deterministic=False)
+    cases: list[dict] = []
+    seen: set[str] = set()
+    try:
+        attempts = 0
+        while len(cases) < count and attempts < count * 10:
+            template = TEMPLATES[attempts % len(TEMPLATES)]
+            attempts += 1
+            case = template(conn, rng)
+            if case is None or case["question"] in seen:
+                continue
+            seen.add(case["question"])
+            cases.append({"id": f"synth_{len(cases) + 1:04d}", **case})
+    finally:
+        conn.close()
+    return cases
+
+
+def load_cases(path: str | Path) -> list[dict]:
+    """Test cases from a ``*.questions.json`` file written by this module."""
+    return json.loads(Path(path).read_text(encoding="utf-8"))["cases"]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scale",
+        type=int,
+        nargs="+",
+        default=[10],
+        help="Row scale factor(s) relative to chinook.db; one database per value.",
+    )
+    parser.add_argument(
+        "--extra-tables",
+        type=int,
+        default=0,
+        help="Number of additional small tables, to test schema width.",
+    )
+    parser.add_argument("--questions", type=int, default=40, help="Questions per database.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path("synthetic_data"),
+        help="Directory for <name>.db and <name>.questions.json (default: synthetic_data).",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    out_dir = args.output_dir
+    if not out_dir.is_absolute():
+        out_dir = _sql_agent_root / out_dir
+
+    for scale in args.scale:
+        name = database_name(scale, args.extra_tables)
+        db_path = out_dir / f"{name}.db"
+        start = time.perf_counter()
+        build_database(db_path, scale, args.extra_tables, args.seed)
+        cases = generate_questions(db_path, args.questions, args.seed)
+        questions_path = out_dir / f"{name}.questions.json"
+        questions_path.write_text(
+            json.dumps(
+                {
+                    "database": db_path.name,
+                    "scale": scale,
+                    "extra_tables": args.extra_tables,
+                    "seed": args.seed,
+                    "cases": cases,
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        size_mb = db_path.stat().st_size / 2**20
+        print(
+            f"{db_path} ({size_mb:.1f} MB, {time.perf_counter() - start:.1f} s), "
+            f"{len(cases)} questions in {questions_path.name}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,24 +6,31 @@ TEST_CASES = [
         "id": "simple_001",
         "question": "What are all the genres?",
         "expected_answer_contains": ["Rock", "Jazz", "Metal"],
+        "expected_sql": "SELECT Name FROM genres",
+        "result_match": "subset",
         "category": "simple",
     },
     {
         "id": "simple_002",
         "question": "List all media types.",
         "expected_answer_contains": ["MPEG", "AAC"],
+        "expected_sql": "SELECT Name FROM media_types",
+        "result_match": "subset",
         "category": "simple",
     },
     {
         "id": "simple_003",
         "question": "What are the names of all playlists?",
         "expected_answer_contains": ["Music", "Movies"],
+        "expected_sql": "SELECT Name FROM playlists",
+        "result_match": "subset",
         "category": "simple",
     },
     {
         "id": "simple_004",
         "question": "Show me the first 5 artist names.",
         "expected_answer_contains": ["AC/DC"],
+        "expected_sql": "SELECT Name FROM artists ORDER BY ArtistId LIMIT 5",
         "category": "simple",
     },
     # --- Aggregations ---
@@ -31,24 +38,28 @@ TEST_CASES = [
         "id": "agg_001",
         "question": "How many employees are there?",
         "expected_answer_contains": ["8"],
+        "expected_sql": "SELECT COUNT(*) FROM employees",
         "category": "aggregation",
     },
     {
         "id": "agg_002",
         "question": "What is the total number of tracks?",
         "expected_answer_contains": ["3,503"],
+        "expected_sql": "SELECT COUNT(*) FROM tracks",
         "category": "aggregation",
     },
     {
         "id": "agg_003",
         "question": "How many albums are in the database?",
         "expected_answer_contains": ["347"],
+        "expected_sql": "SELECT COUNT(*) FROM albums",
         "category": "aggregation",
     },
     {
         "id": "agg_004",
         "question": "What is the total amount of all invoices?",
         "expected_answer_contains": ["2328.6"],
+        "expected_sql": "SELECT SUM(Total) FROM invoices",
         "category": "aggregation",
     },
     # --- Joins ---
@@ -56,12 +67,21 @@ TEST_CASES = [
         "id": "join_001",
         "question": "List all albums by AC/DC.",
         "expected_answer_contains": ["For Those About To Rock", "Let There Be Rock"],
+        "expected_sql": (
+            "SELECT al.Title FROM albums al JOIN artists ar ON "
+            "al.ArtistId = ar.ArtistId WHERE ar.Name = 'AC/DC'"
+        ),
         "category": "join",
     },
     {
         "id": "join_002",
         "question": "Which albums did Iron Maiden release?",
         "expected_answer_contains": ["Iron Maiden"],
+        "expected_sql": (
+            "SELECT al.Title FROM albums al JOIN artists ar ON "
+            "al.ArtistId = ar.ArtistId WHERE ar.Name = 'Iron Maiden'"
+        ),
+        "result_match": "subset",
         "category": "join",
     },
     # --- Filters ---
@@ -69,18 +89,27 @@ TEST_CASES = [
         "id": "filter_001",
         "question": "Which customers are from Brazil?",
         "expected_answer_contains": ["Luís", "Gonçalves"],
+        "expected_sql": "SELECT FirstName, LastName FROM customers WHERE Country = 'Brazil'",
+        "result_match": "subset",
         "category": "filter",
     },
     {
         "id": "filter_002",
         "question": "List employees who were hired after 2002.",
         "expected_answer_contains": ["2003", "2004"],
+        "expected_sql": (
+            "SELECT FirstName, LastName FROM employees WHERE HireDate >= "
+            "'2003-01-01'"
+        ),
+        "result_match": "subset",
         "category": "filter",
     },
     {
         "id": "filter_003",
         "question": "Which tracks are longer than 5 minutes?",
         "expected_answer_contains": ["300000"],
+        "expected_sql": "SELECT Name FROM tracks WHERE Milliseconds > 300000",
+        "result_match": "subset",
         "category": "filter",
     },
     # --- Complex ---
@@ -88,18 +117,35 @@ TEST_CASES = [
         "id": "complex_001",
         "question": "Who are the top 3 customers by total purchase amount?",
         "expected_answer_contains": ["Helena", "Richard", "Luis"],
+        "expected_sql": (
+            "SELECT c.FirstName FROM customers c JOIN invoices i ON "
+            "c.CustomerId = i.CustomerId GROUP BY c.CustomerId ORDER BY "
+            "SUM(i.Total) DESC LIMIT 3"
+        ),
         "category": "complex",
     },
     {
         "id": "complex_002",
         "question": "Which artist has the most albums?",
         "expected_answer_contains": ["Iron Maiden"],
+        "expected_sql": (
+            "SELECT ar.Name FROM artists ar JOIN albums al ON al.ArtistId "
+            "= ar.ArtistId GROUP BY ar.ArtistId ORDER BY COUNT(*) DESC "
+            "LIMIT 1"
+        ),
         "category": "complex",
     },
     {
         "id": "complex_003",
         "question": "What are the top 5 best-selling tracks by number of times purchased?",
         "expected_answer_contains": ["track"],
+        "expected_sql": (
+            "SELECT t.Name FROM tracks t JOIN invoice_items ii ON "
+            "ii.TrackId = t.TrackId GROUP BY t.TrackId HAVING COUNT(*) = "
+            "(SELECT MAX(n) FROM (SELECT COUNT(*) AS n FROM invoice_items "
+            "GROUP BY TrackId))"
+        ),
+        "result_match": "subset",
         "category": "complex",
     },
 ]
@@ -0,0 +1,135 @@
+"""Multi-process evaluation: test cases fanned out over a process pool.
+
+Each worker process builds its own agent, database connection and ground-truth
+cache once (``init_worker``), then runs cases one at a time on a private event
+loop. Cases are handed out individually, so slow cases do not leave other
+workers idle, and results stream back to the parent as they finish, where they
+are merged into one ``SQLAgentEvaluator`` (summary, run store, export).
+
+Workers are started with ``spawn``: the parent runs logging/telemetry threads
+that must not be forked mid-flight. Settings changed at runtime in the parent
+are passed explicitly in ``WorkerConfig``.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Ensure sql-agent root is on path in spawned workers
+_sql_agent_root = Path(__file__).resolve().parent.parent
+if str(_sql_agent_root) not in sys.path:
+    sys.path.insert(0, str(_sql_agent_root))
+
+from config import settings
+from eval.evaluator import EvalResult, EvalSummary, SQLAgentEvaluator
+from eval.ground_truth import GroundTruthCache
+
+
+@dataclass(frozen=True)
+class WorkerConfig:
+    """What a worker needs to rebuild the parent's agent in a fresh process."""
+
+    agent: str = "sql_agent"  # or "custom_sql_agent"
+    database: Optional[str] = None
+    routing_policy: Optional[str] = None
+    fast: bool = False
+    ground_truth_cache: Optional[str] = None
+    fake_llm: bool = False
+
+
+_evaluator: Optional[SQLAgentEvaluator] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def init_worker(config: WorkerConfig) -> None:
+    """Build this worker's agent and evaluator (runs once per process)."""
+    global _evaluator, _loop
+    settings.few_shot_record_production = False
+    if config.database:
+        settings.sqlite_database = config.database
+    # One metrics endpoint/file per process: skip the port, suffix the file
+    settings.metrics_port = 0
+    if settings.metrics_path:
+        path = Path(settings.metrics_path)
+        settings.metrics_path = str(path.with_name(f"{path.stem}.worker{os.getpid()}{path.suffix}"))
+    if config.fake_llm:
+        use_fake_llm()
+
+    if config.agent == "custom_sql_agent":
+        import custom_sql_agent as module
+
+        agent = module.get_eval_agent(config.routing_policy, sql_only=config.fast)
+    else:
+        import sql_agent as module
+
+        agent = module.get_eval_agent()
+    ground_truth = GroundTruthCache(module.db, config.ground_truth_cache)
+    _evaluator = SQLAgentEvaluator(agent, module.db, ground_truth=ground_truth, fast=config.fast)
+    _loop = asyncio.new_event_loop()
+
+
+def run_case(test_case: dict) -> EvalResult:
+    """Run one test case in this worker."""
+    return _loop.run_until_complete(_evaluator.run_single_test(test_case))
+
+
+def use_fake_llm() -> None:
+    """Route every model lookup to the instant fake model from ``eval.bench_overhead``.
+
+    Also stops recording few-shot examples: fake answers must not reach the store.
+    """
+    import llm
+    from eval.bench_overhead import fake_model
+
+    settings.few_shot_record_production = False
+    model = fake_model()
+    llm._build_llm.cache_clear()
+    llm._build_llm = lambda _model_name: model
+
+
+async def run_sharded(
+    evaluator: SQLAgentEvaluator,
+    test_cases: list[dict],
+    workers: int,
+    config: WorkerConfig,
+    verbose: bool = True,
+) -> EvalSummary:
+    """Run ``test_cases`` across ``workers`` processes, merging into ``evaluator``.
+
+    Cases with a reusable result in ``evaluator.run_store`` are not sent out.
+    Results are printed as they arrive and kept in test-case order.
+    """
+    evaluator.results = []
+    by_id: dict[str, EvalResult] = {}
+    pending = []
+    for tc in test_cases:
+        cached = evaluator.run_store.get(tc) if evaluator.run_store else None
+        if cached is not None:
+            evaluator.add_result(tc, cached, verbose)
+            by_id[tc["id"]] = cached
+        else:
+            pending.append(tc)
+
+    if pending:
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            mp_context=context,
+            initializer=init_worker,
+            initargs=(config,),
+        ) as pool:
+            futures = [asyncio.wrap_future(pool.submit(run_case, tc), loop=loop) for tc in pending]
+            cases = {tc["id"]: tc for tc in pending}
+            for future in asyncio.as_completed(futures):
+                result = await future
+                evaluator.add_result(cases[result.test_id], result, verbose)
+                by_id[result.test_id] = result
+
+    evaluator.results = [by_id[tc["id"]] for tc in test_cases]
+    return evaluator.compute_summary(test_cases)
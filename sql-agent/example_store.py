@@ -0,0 +1,259 @@
+"""Few-shot example store: verified (question, SQL) pairs retrieved per question.
+
+Examples are persisted as JSON lines and indexed in memory as L2-normalized
+TF-IDF vectors, so a lookup is one matrix-vector product over the store.
+"""
+import json
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from config import settings
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are all any by do does for from how i in is it me of on or show "
+    "the their there to was were what which who with".split()
+)
+
+
+def _tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def _normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+
+@dataclass
+class SQLExample:
+    """A verified question and the SQL that answered it."""
+
+    question: str
+    sql: str
+    source: str = "production"
+
+
+class ExampleStore:
+    """Append-only JSONL store of SQL examples with an in-memory TF-IDF index."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.examples: list[SQLExample] = []
+        self._questions: set[str] = set()
+        self._lock = threading.Lock()
+        self._vocab: dict[str, int] = {}
+        self._idf: Optional[np.ndarray] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.examples)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    example = SQLExample(**json.loads(line))
+                except (ValueError, TypeError) as e:
+                    logger.warning("Skipping malformed example in %s: %s", self.path, e)
+                    continue
+                key = _normalize_question(example.question)
+                if key not in self._questions:
+                    self._questions.add(key)
+                    self.examples.append(example)
+        logger.info("Loaded %d few-shot examples from %s", len(self.examples), self.path)
+
+    def add(self, question: str, sql: str, source: str = "production") -> bool:
+        """Persist a new example; returns False if the question is already stored."""
+        key = _normalize_question(question)
+        with self._lock:
+            if not question.strip() or not sql.strip() or key in self._questions:
+                return False
+            example = SQLExample(question=question.strip(), sql=sql.strip(), source=source)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(example)) + "\n")
+            self._questions.add(key)
+            self.examples.append(example)
+            # Rebuilt lazily on the next search
+            self._matrix = None
+        logger.debug("Stored few-shot example (%s): %s", source, question)
+        return True
+
+    def _build_index(self) -> None:
+        docs = [Counter(_tokenize(e.question)) for e in self.examples]
+        doc_freq: Counter = Counter()
+        for doc in docs:
+            doc_freq.update(doc.keys())
+        self._vocab = {term: i for i, term in enumerate(sorted(doc_freq))}
+        n = len(docs)
+        self._idf = np.array(
+            [math.log((1 + n) / (1 + doc_freq[t])) + 1.0 for t in self._vocab],
+            dtype=np.float32,
+        )
+        matrix = np.zeros((n, len(self._vocab)), dtype=np.float32)
+        for row, doc in enumerate(docs):
+            for term, count in doc.items():
+                matrix[row, self._vocab[term]] = count
+        matrix *= self._idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self._matrix = matrix / np.where(norms == 0, 1.0, norms)
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        vec = np.zeros(len(self._vocab), dtype=np.float32)
+        for term, count in Counter(_tokenize(text)).items():
+            idx = self._vocab.get(term)
+            if idx is not None:
+                vec[idx] = count
+        vec *= self._idf
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def search(
+        self, question: str, k: int = 3, min_score: float = 0.0
+    ) -> list[tuple[SQLExample, float]]:
+        """Return up to ``k`` examples most similar to ``question`` (cosine score)."""
+        with self._lock:
+            if not self.examples or k <= 0:
+                return []
+            if self._matrix is None:
+                self._build_index()
+            scores = self._matrix @ self._vectorize(question)
+            examples = list(self.examples)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(examples[i], float(scores[i])) for i in top if scores[i] > min_score]
+
+
+def get_example_store_path() -> Path:
+    """``settings.few_shot_store_path``, resolved against the project root."""
+    path = Path(settings.few_shot_store_path)
+    if not path.is_absolute():
+        path = Path(__file__).resolve().parent / path
+    return path
+
+
+@lru_cache(maxsize=None)
+def get_example_store() -> ExampleStore:
+    """Return the process-wide example store at ``settings.few_shot_store_path``."""
+    return ExampleStore(get_example_store_path())
+
+
+def format_examples(examples: Sequence[SQLExample]) -> str:
+    """Render examples as a prompt block (empty string when there are none)."""
+    if not examples:
+        return ""
+    lines = ["", "Here are verified examples of questions and the SQL that answered them:"]
+    for example in examples:
+        lines.append(f"Question: {example.question}")
+        lines.append(f"SQL: {example.sql}")
+    return "\n".join(lines) + "\n"
+
+
+def latest_question(messages: Sequence[BaseMessage]) -> str:
+    """Text of the most recent user message."""
+    for msg in reversed(messages):
+        if isinstance(msg, HumanMessage):
+            return msg.text
+    return ""
+
+
+def successful_queries(messages: Sequence[BaseMessage]) -> list[str]:
+    """SQL passed to ``sql_db_query`` that executed without error, in order."""
+    pending: dict[str, str] = {}
+    queries: list[str] = []
+    for msg in messages:
+        if isinstance(msg, AIMessage):
+            for call in msg.tool_calls:
+                if call["name"] == "sql_db_query" and call.get("id"):
+                    pending[call["id"]] = call["args"].get("query", "")
+        elif isinstance(msg, ToolMessage) and msg.tool_call_id in pending:
+            query = pending.pop(msg.tool_call_id)
+            if msg.status != "error" and not str(msg.content).startswith("Error"):
+                queries.append(query)
+    return queries
+
+
+def _since_latest_question(messages: Sequence[BaseMessage]) -> Sequence[BaseMessage]:
+    for idx in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[idx], HumanMessage):
+            return messages[idx:]
+    return messages
+
+
+def few_shot_block(messages: Sequence[BaseMessage]) -> str:
+    """Prompt block with the top-k stored examples for the latest question."""
+    if not settings.few_shot_enabled:
+        return ""
+    question = latest_question(messages)
+    if not question:
+        return ""
+    hits = get_example_store().search(
+        question, k=settings.few_shot_k, min_score=settings.few_shot_min_score
+    )
+    return format_examples([example for example, _ in hits])
+
+
+def few_shot_messages(messages: Sequence[BaseMessage]) -> list[HumanMessage]:
+    """The few-shot block as a message to place right after the static system prompt."""
+    block = few_shot_block(messages)
+    return [HumanMessage(content=block.strip())] if block else []
+
+
+def record_success(messages: Sequence[BaseMessage]) -> None:
+    """Store the last successful query of a finished run as a production example."""
+    if not (settings.few_shot_enabled and settings.few_shot_record_production):
+        return
+    turn = _since_latest_question(messages)
+    queries = successful_queries(turn)
+    if queries:
+        get_example_store().add(latest_question(turn), queries[-1], source="production")
+
+
+class FewShotMiddleware(AgentMiddleware):
+    """Inject retrieved examples after the system prompt; record successful runs.
+
+    The system prompt itself is left untouched so it stays a byte-identical,
+    cacheable prefix across questions. With ``record=False`` (eval agents)
+    nothing is written to the store.
+    """
+
+    def __init__(self, record: bool = True):
+        super().__init__()
+        self.record = record
+
+    def _with_examples(self, request: Any) -> Any:
+        examples = few_shot_messages(request.messages)
+        if not examples:
+            return request
+        return request.override(messages=[*examples, *request.messages])
+
+    def wrap_model_call(self, request, handler):
+        return handler(self._with_examples(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(self._with_examples(request))
+
+    def after_agent(self, state, runtime):
+        if self.record:
+            record_success(state["messages"])
+        return None
@@ -1,26 +1,137 @@
 """LLM factory: returns the chat model based on root config (Ollama or Gemini)."""
+import json
+from functools import lru_cache
+from typing import Any, Literal, Sequence
+
+import httpx
+from langchain.agents.middleware import ModelRetryMiddleware
+from langchain_core.exceptions import OutputParserException
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langgraph.types import RetryPolicy
 
 from config import settings
 from logging_config import get_logger
+from telemetry import record_cache
 
 logger = get_logger(__name__)
 
+# HTTP status codes worth retrying: timeouts, rate limits and server-side failures
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 425, 429, 500, 502, 503, 504})
+
+# (id(model), tool ids, tool_choice) -> (model, tools, bound runnable)
+_bound_models: dict[tuple, tuple[BaseChatModel, tuple[BaseTool, ...], Runnable]] = {}
+
+
+def _http_timeout() -> httpx.Timeout:
+    """Per-call timeout: short connect, bounded total read time."""
+    return httpx.Timeout(
+        settings.llm_timeout_seconds,
+        connect=settings.llm_connect_timeout_seconds,
+    )
+
+
+def _http_limits() -> httpx.Limits:
+    """Connection pool limits for the keep-alive HTTP client."""
+    return httpx.Limits(
+        max_connections=settings.llm_max_connections,
+        max_keepalive_connections=settings.llm_max_keepalive_connections,
+        keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+    )
+
+
+def _keep_alive() -> int | str | None:
+    """Ollama ``keep_alive``: a duration string ("30m") or seconds (-1 = forever)."""
+    value = settings.llm_keep_alive.strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def is_parse_error(exc: BaseException) -> bool:
+    """True if the model returned malformed JSON or an unparseable tool call.
+
+    Only decode/parse failures count: other errors that merely mention JSON
+    (e.g. "not JSON serializable") are bugs and must not be retried.
+    """
+    if isinstance(exc, (json.JSONDecodeError, OutputParserException)):
+        return True
+    return "object key string" in str(exc).lower()
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """True if a failed LLM call is worth retrying (network, timeout, 429/5xx, bad JSON)."""
+    if isinstance(exc, (httpx.TimeoutException, httpx.TransportError)):
+        return True
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+        return True
+    return is_parse_error(exc)
+
 
-def get_llm() -> BaseChatModel:
-    """Return the configured chat model (Ollama or Gemini)."""
+def get_retry_policy() -> RetryPolicy:
+    """Node-level retry policy for LangGraph nodes that call the LLM."""
+    return RetryPolicy(
+        initial_interval=settings.llm_retry_initial_delay_seconds,
+        backoff_factor=settings.llm_retry_backoff_factor,
+        max_interval=settings.llm_retry_max_delay_seconds,
+        max_attempts=settings.llm_max_retries + 1,
+        jitter=True,
+        retry_on=is_transient_error,
+    )
+
+
+def get_model_retry_middleware() -> ModelRetryMiddleware:
+    """Agent middleware that retries only the failing model call."""
+    return ModelRetryMiddleware(
+        max_retries=settings.llm_max_retries,
+        retry_on=is_transient_error,
+        on_failure="error",
+        initial_delay=settings.llm_retry_initial_delay_seconds,
+        backoff_factor=settings.llm_retry_backoff_factor,
+        max_delay=settings.llm_retry_max_delay_seconds,
+        jitter=True,
+    )
+
+
+def get_llm(model: str | None = None) -> BaseChatModel:
+    """Return the configured chat model (Ollama or Gemini).
+
+    ``model`` overrides ``settings.llm_model``. Instances are cached per model
+    name so every agent in the process shares one pooled keep-alive HTTP
+    client instead of opening new connections per model.
+    """
+    return _build_llm(model or settings.llm_model)
+
+
+@lru_cache(maxsize=None)
+def _build_llm(model: str) -> BaseChatModel:
+    """Build the chat model for ``model`` on the configured provider."""
     if settings.llm_provider == "gemini":
         from langchain_google_genai import ChatGoogleGenerativeAI
 
         logger.info(
             "Using LLM provider: %s, model: %s",
             settings.llm_provider,
-            settings.llm_model,
+            model,
         )
+        # max_retries maps to the SDK's total attempts; retries happen per graph node.
+        # Identical prompt prefixes are cached implicitly; cached_content pins an
+        # explicit cache of the static prefix.
         return ChatGoogleGenerativeAI(
-            model=settings.llm_model,
+            model=model,
             api_key=settings.google_api_key or None,
             temperature=settings.llm_temperature,
+            timeout=settings.llm_timeout_seconds,
+            max_retries=1,
+            client_args={"limits": _http_limits()},
+            cached_content=settings.gemini_cached_content or None,
         )
     if settings.llm_provider == "ollama":
         from langchain_ollama import ChatOllama
@@ -28,12 +139,16 @@ def get_llm() -> BaseChatModel:
         logger.info(
             "Using LLM provider: %s, model: %s",
             settings.llm_provider,
-            settings.llm_model,
+            model,
         )
+        # Ollama reuses the KV cache of the longest matching prompt prefix while
+        # the model stays loaded; keep_alive controls how long that is
         return ChatOllama(
-            model=settings.llm_model,
+            model=model,
             base_url=settings.ollama_base_url,
             temperature=settings.llm_temperature,
+            keep_alive=_keep_alive(),
+            client_kwargs={"timeout": _http_timeout(), "limits": _http_limits()},
         )
     logger.error(
         "Unknown LLM_PROVIDER=%r; use 'ollama' or 'gemini'",
@@ -42,3 +157,50 @@ def get_llm() -> BaseChatModel:
     raise ValueError(
         f"Unknown LLM_PROVIDER={settings.llm_provider!r}; use 'ollama' or 'gemini'"
     )
+
+
+def get_node_llm(
+    node: Literal["schema", "query", "check"],
+    policy: str | None = None,
+    escalated: bool = False,
+) -> BaseChatModel:
+    """Return the chat model a graph node should use under a routing policy.
+
+    ``single`` always uses ``settings.llm_model``; ``per_node`` uses the node's
+    own model; ``escalate`` does the same until the run escalates, after which
+    query generation and checking use ``settings.llm_escalation_model``.
+    """
+    policy = policy or settings.llm_routing_policy
+    if policy == "single":
+        return get_llm()
+    node_models = {
+        "schema": settings.llm_schema_model,
+        "query": settings.llm_query_model,
+        "check": settings.llm_check_model,
+    }
+    if policy == "escalate" and escalated and node != "schema":
+        return get_llm(settings.llm_escalation_model or None)
+    return get_llm(node_models[node] or None)
+
+
+def bind_tools_cached(
+    model: BaseChatModel,
+    tools: Sequence[BaseTool],
+    tool_choice: Any = None,
+) -> Runnable:
+    """Return ``model.bind_tools(tools, tool_choice=...)``, built once per (model, toolset).
+
+    Binding converts every tool to a JSON schema and wraps the model in a new
+    runnable, so graph nodes reuse the cached result instead of rebinding on
+    every step.
+    """
+    # Keyed on tool identity: distinct tools may share a name (e.g. sql_db_query)
+    key = (id(model), tuple(id(t) for t in tools), tool_choice)
+    entry = _bound_models.get(key)
+    # The model and tools are kept in the entry so their ids cannot be reused while cached
+    hit = entry is not None and entry[0] is model
+    record_cache("bind_tools", hit)
+    if not hit:
+        entry = (model, tuple(tools), model.bind_tools(tools, tool_choice=tool_choice))
+        _bound_models[key] = entry
+    return entry[2]
@@ -1,20 +1,52 @@
-"""Centralized logging configuration for the SQL agent project."""
+"""Centralized logging configuration for the SQL agent project.
+
+Handlers run on a background ``QueueListener`` thread: the request path only
+enqueues records, so slow stdout or file I/O never stalls a graph step.
+"""
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 
 from config import settings
 
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
+_listeners: list[QueueListener] = []
+
+
+def attach_queue_handlers(logger: logging.Logger, *handlers: logging.Handler) -> None:
+    """Route ``logger`` through a queue to ``handlers`` served by a background thread."""
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    if not _listeners:
+        atexit.register(stop_logging)
+    _listeners.append(listener)
+
+
+def stop_logging() -> None:
+    """Flush and stop all background log listeners."""
+    while _listeners:
+        _listeners.pop().stop()
+
 
 def setup_logging() -> None:
-    """Configure the root logger with level and format from settings."""
+    """Configure the root logger with level and format from settings.
+
+    Like ``logging.basicConfig``, this does nothing if the root logger already
+    has handlers (e.g. when the LangGraph server configured logging first).
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
     level = getattr(logging, settings.log_level.upper(), logging.INFO)
-    logging.basicConfig(
-        level=level,
-        format=LOG_FORMAT,
-        handlers=[logging.StreamHandler(sys.stdout)],
-    )
+    root.setLevel(level)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    attach_queue_handlers(root, stream_handler)
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -1,16 +1,20 @@
 """SQL agent for SQLite, used by both LangGraph Studio and the FastAPI API."""
 from langchain.agents import create_agent
 from langchain.agents.middleware import HumanInTheLoopMiddleware
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
 from langchain_community.utilities import SQLDatabase
 from langgraph.checkpoint.memory import InMemorySaver
 
+from admission import AdmissionMiddleware
 from config import get_sqlite_connection_uri
+from database import SQLAgentDatabase, SQLAgentToolkit
+from example_store import FewShotMiddleware
 from logging_config import get_logger, setup_logging
+from telemetry import get_callbacks, setup_telemetry
 
 setup_logging()
+setup_telemetry()
 logger = get_logger(__name__)
-from llm import get_llm
+from llm import get_llm, get_model_retry_middleware
 
 
 def db_info(db: SQLDatabase) -> None:
@@ -25,7 +29,7 @@ def db_info(db: SQLDatabase) -> None:
 def connect_database() -> SQLDatabase:
     """Connect to SQLite and return the SQLDatabase instance."""
     try:
-        db = SQLDatabase.from_uri(get_sqlite_connection_uri())
+        db = SQLAgentDatabase.from_uri(get_sqlite_connection_uri())
         logger.info("Connected to SQLite database")
         db_info(db)
         return db
@@ -38,11 +42,12 @@ model = get_llm()
 db = connect_database()
 
 # SQL tools for the agent
-toolkit = SQLDatabaseToolkit(db=db, llm=model)
+toolkit = SQLAgentToolkit(db=db, llm=model)
 tools = toolkit.get_tools()
 logger.info("SQL agent initialized with %d tools", len(tools))
 
-# Safety-focused system prompt (read-only, no DML)
+# Safety-focused system prompt (read-only, no DML). It is fully static (built once,
+# few-shot examples go in a separate message) so providers can cache it as a prefix.
 system_prompt = """
 You are an agent designed to interact with a SQL database.
 If the user asks a question about you, you can answer about yourself and your capabilities.
@@ -76,9 +81,12 @@ To start you should ALWAYS look at the tables in the database to see what you
 can query. Do NOT skip this step.
 
 Then you should query the schema of the most relevant tables.
+
+The {dialect} database has these tables: {tables}
 """.format(
     dialect=db.dialect,
     top_k=5,
+    tables=", ".join(db.get_usable_table_names()),
 )
 
 agent = create_agent(
@@ -90,8 +98,11 @@ agent = create_agent(
             interrupt_on={"sql_db_query": True},
             description_prefix="Tool execution pending approval",
         ),
+        FewShotMiddleware(),
+        get_model_retry_middleware(),
+        AdmissionMiddleware(),
     ]
-)
+).with_config(callbacks=get_callbacks())
 
 
 def get_eval_agent():
@@ -100,4 +111,9 @@ def get_eval_agent():
         model,
         tools,
         system_prompt=system_prompt,
-    )
+        middleware=[
+            FewShotMiddleware(record=False),
+            get_model_retry_middleware(),
+            AdmissionMiddleware(),
+        ],
+    ).with_config(callbacks=get_callbacks())
@@ -0,0 +1,431 @@
+"""Local telemetry: structured JSON spans and Prometheus-style metrics.
+
+Spans are emitted as JSON lines through a queue-backed logger, and metrics
+live in an in-process registry rendered in the Prometheus text format, either
+served on ``/metrics`` or written to a file. No external service is needed.
+"""
+import atexit
+import json
+import logging
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from config import settings
+from logging_config import attach_queue_handlers, get_logger
+
+logger = get_logger(__name__)
+span_logger = get_logger("sql_agent.spans")
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+TOKEN_BUCKETS = (16, 64, 256, 1_024, 4_096, 16_384, 65_536)
+
+
+def _label_key(labels: dict[str, Any]) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {value:g}" for key, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][idx] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def count(self, **labels: Any) -> int:
+        entry = self._values.get(_label_key(labels))
+        return entry[2] if entry else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(e[0]), e[1], e[2]) for key, e in self._values.items()]
+        lines = []
+        for key, bucket_counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(key, (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Get-or-create registry of named metrics."""
+
+    def __init__(self):
+        self._metrics: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls: type, name: str, help_text: str, **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+node_duration = metrics.histogram(
+    "sql_agent_node_duration_seconds", "Graph node execution time."
+)
+node_errors = metrics.counter("sql_agent_node_errors_total", "Graph node failures.")
+llm_duration = metrics.histogram("sql_agent_llm_duration_seconds", "LLM call latency.")
+llm_errors = metrics.counter("sql_agent_llm_errors_total", "Failed LLM calls.")
+llm_tokens = metrics.histogram(
+    "sql_agent_llm_tokens", "Tokens per LLM call.", buckets=TOKEN_BUCKETS
+)
+llm_tokens_total = metrics.counter("sql_agent_llm_tokens_total", "Tokens used by LLM calls.")
+sql_duration = metrics.histogram("sql_agent_sql_duration_seconds", "SQL execution time.")
+sql_rows = metrics.histogram("sql_agent_sql_rows", "Rows returned per SQL statement.", buckets=ROW_BUCKETS)
+sql_errors = metrics.counter("sql_agent_sql_errors_total", "Failed SQL statements.")
+cache_hits = metrics.counter("sql_agent_cache_hits_total", "Cache hits by cache name.")
+cache_misses = metrics.counter("sql_agent_cache_misses_total", "Cache misses by cache name.")
+admission_queue_depth = metrics.gauge(
+    "sql_agent_admission_queue_depth", "Calls waiting for admission, by limiter."
+)
+admission_in_flight = metrics.gauge(
+    "sql_agent_admission_in_flight", "Admitted calls currently running, by limiter."
+)
+admission_wait = metrics.histogram(
+    "sql_agent_admission_wait_seconds", "Time spent waiting for admission, by limiter."
+)
+admission_rejected = metrics.counter(
+    "sql_agent_admission_rejected_total", "Calls rejected by admission control, by limiter and reason."
+)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a hit or miss for the named cache."""
+    (cache_hits if hit else cache_misses).inc(cache=cache)
+
+
+def emit_span(
+    name: str,
+    kind: str,
+    start: float,
+    duration_s: float,
+    *,
+    span_id: Optional[str] = None,
+    parent_id: Optional[str] = None,
+    error: Optional[BaseException] = None,
+    **attributes: Any,
+) -> None:
+    """Log one finished span as a JSON line (wall-clock ``start``, seconds)."""
+    if not settings.telemetry_enabled or not span_logger.isEnabledFor(logging.DEBUG):
+        return
+    record = {
+        "span_id": span_id or uuid.uuid4().hex[:16],
+        "parent_id": parent_id,
+        "kind": kind,
+        "name": name,
+        "start": round(start, 6),
+        "duration_ms": round(duration_s * 1000, 3),
+        "status": "error" if error is not None else "ok",
+    }
+    if error is not None:
+        record["error"] = f"{type(error).__name__}: {error}"
+    if attributes:
+        record["attributes"] = attributes
+    span_logger.debug(json.dumps(record, default=str))
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes: Any) -> Iterator[dict]:
+    """Time a block and emit it as a span; the yielded dict adds attributes."""
+    start = time.time()
+    t0 = time.perf_counter()
+    extra: dict[str, Any] = {}
+    try:
+        yield extra
+    except BaseException as e:
+        emit_span(name, kind, start, time.perf_counter() - t0, error=e, **attributes, **extra)
+        raise
+    emit_span(name, kind, start, time.perf_counter() - t0, **attributes, **extra)
+
+
+def _model_name(serialized: Optional[dict], metadata: Optional[dict]) -> str:
+    return (
+        (metadata or {}).get("ls_model_name")
+        or (serialized or {}).get("name")
+        or "unknown"
+    )
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """LangChain callback handler emitting spans and metrics for graph nodes and LLM calls."""
+
+    # Bookkeeping only; never hop to an executor thread
+    run_inline = True
+
+    def __init__(self):
+        self._runs: dict[UUID, tuple] = {}
+
+    def _start(self, run_id: UUID, kind: str, name: str) -> None:
+        self._runs[run_id] = (kind, name, time.time(), time.perf_counter())
+
+    def _finish(
+        self,
+        run_id: UUID,
+        parent_run_id: Optional[UUID],
+        error: Optional[BaseException] = None,
+        **attributes: Any,
+    ) -> Optional[tuple[str, str, float]]:
+        entry = self._runs.pop(run_id, None)
+        if entry is None:
+            return None
+        kind, name, start, t0 = entry
+        duration = time.perf_counter() - t0
+        emit_span(
+            name,
+            kind,
+            start,
+            duration,
+            span_id=run_id.hex[-16:],
+            parent_id=parent_run_id.hex[-16:] if parent_run_id else None,
+            error=error,
+            **attributes,
+        )
+        return kind, name, duration
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        # Only the node's own run, not every runnable nested inside it
+        if node and kwargs.get("name") == node:
+            self._start(run_id, "node", node)
+
+    def on_chain_end(self, outputs, *, run_id, parent_run_id=None, **kwargs):
+        finished = self._finish(run_id, parent_run_id)
+        if finished:
+            node_duration.observe(finished[2], node=finished[1])
+
+    def on_chain_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        finished = self._finish(run_id, parent_run_id, error=error)
+        if finished:
+            node_duration.observe(finished[2], node=finished[1])
+            node_errors.inc(node=finished[1])
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        model = _model_name(serialized, metadata)
+        self._start(run_id, "llm", model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        model = _model_name(serialized, metadata)
+        self._start(run_id, "llm", model)
+
+    def on_llm_end(self, response, *, run_id, parent_run_id=None, **kwargs):
+        usage = {}
+        try:
+            usage = response.generations[0][0].message.usage_metadata or {}
+        except (AttributeError, IndexError):
+            pass
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        finished = self._finish(
+            run_id, parent_run_id, input_tokens=input_tokens, output_tokens=output_tokens
+        )
+        if finished:
+            model = finished[1]
+            llm_duration.observe(finished[2], model=model)
+            llm_tokens.observe(input_tokens, model=model, direction="input")
+            llm_tokens.observe(output_tokens, model=model, direction="output")
+            llm_tokens_total.inc(input_tokens, model=model, direction="input")
+            llm_tokens_total.inc(output_tokens, model=model, direction="output")
+
+    def on_llm_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        finished = self._finish(run_id, parent_run_id, error=error)
+        if finished:
+            llm_duration.observe(finished[2], model=finished[1])
+            llm_errors.inc(model=finished[1])
+
+
+telemetry_handler = TelemetryCallbackHandler()
+
+
+def get_callbacks() -> list[BaseCallbackHandler]:
+    """Callbacks to attach to compiled graphs (empty when telemetry is disabled)."""
+    return [telemetry_handler] if settings.telemetry_enabled else []
+
+
+def _resolve(path: str) -> Path:
+    resolved = Path(path)
+    if not resolved.is_absolute():
+        resolved = Path(__file__).resolve().parent / resolved
+    return resolved
+
+
+def write_metrics_file(path: str | Path) -> None:
+    """Atomically rewrite ``path`` with the current metrics."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(metrics.render_prometheus(), encoding="utf-8")
+    tmp.replace(path)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802 - http.server naming
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002 - http.server signature
+        logger.debug("metrics endpoint: " + format, *args)
+
+
+def start_metrics_server(port: int) -> ThreadingHTTPServer:
+    """Serve ``/metrics`` on ``port`` from a daemon thread."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsRequestHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Serving Prometheus metrics on http://127.0.0.1:%d/metrics", port)
+    return server
+
+
+def _flush_metrics_periodically(path: Path, interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            write_metrics_file(path)
+        except OSError as e:
+            logger.warning("Could not write metrics to %s: %s", path, e)
+
+
+_telemetry_started = False
+
+
+def setup_telemetry() -> None:
+    """Start span output and metrics export per settings (idempotent)."""
+    global _telemetry_started
+    if _telemetry_started or not settings.telemetry_enabled:
+        return
+    _telemetry_started = True
+
+    if settings.telemetry_spans_path:
+        spans_path = _resolve(settings.telemetry_spans_path)
+        spans_path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = logging.FileHandler(spans_path, encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter("%(message)s"))
+        span_logger.setLevel(logging.DEBUG)
+        span_logger.propagate = False
+        attach_queue_handlers(span_logger, file_handler)
+        logger.info("Writing telemetry spans to %s", spans_path)
+
+    if settings.metrics_path:
+        metrics_path = _resolve(settings.metrics_path)
+        threading.Thread(
+            target=_flush_metrics_periodically,
+            args=(metrics_path, settings.metrics_flush_seconds),
+            name="metrics-file",
+            daemon=True,
+        ).start()
+        atexit.register(write_metrics_file, metrics_path)
+        logger.info("Writing Prometheus metrics to %s", metrics_path)
+
+    if settings.metrics_port:
+        try:
+            start_metrics_server(settings.metrics_port)
+        except OSError as e:
+            logger.warning("Could not serve metrics on port %d: %s", settings.metrics_port, e)
@@ -3,7 +3,17 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 # Ensure sql-agent root is on path
 _sql_agent_root = Path(__file__).resolve().parent.parent
 if str(_sql_agent_root) not in sys.path:
     sys.path.insert(0, str(_sql_agent_root))
+
+
+@pytest.fixture(autouse=True)
+def _no_example_recording(monkeypatch):
+    """Tests must never write runs into the project's few-shot example store."""
+    from config import settings
+
+    monkeypatch.setattr(settings, "few_shot_record_production", False)
@@ -0,0 +1,91 @@
+"""Unit tests for LLM admission control (limiters, quotas, queue bounds, metrics)."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, ConcurrencyLimiter, user_key
+from telemetry import metrics
+
+
+def test_global_cap_bounds_concurrent_threads():
+    limiter = ConcurrencyLimiter("test_cap", limit=2, max_queue=10)
+    running, peak, lock = 0, 0, threading.Lock()
+
+    def call():
+        nonlocal running, peak
+        with limiter.slot(timeout=5):
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.02)
+            with lock:
+                running -= 1
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert peak == 2
+    assert limiter.idle
+
+
+def test_full_queue_rejects_immediately_and_deadline_expires():
+    limiter = ConcurrencyLimiter("test_full", limit=1, max_queue=1)
+    limiter.acquire()
+    waiter = threading.Thread(target=limiter.acquire, args=(5,))
+    waiter.start()
+    while limiter.queue_depth == 0:
+        time.sleep(0.001)
+
+    start = time.perf_counter()
+    with pytest.raises(AdmissionRejected, match="queue is full"):
+        limiter.acquire(timeout=5)
+    assert time.perf_counter() - start < 0.5
+
+    limiter.release()  # hands the slot to the queued thread
+    waiter.join()
+    with pytest.raises(AdmissionRejected, match="waited"):
+        limiter.acquire(timeout=0.05)
+    assert limiter.queue_depth == 0
+
+    rejected = metrics.counter("sql_agent_admission_rejected_total", "")
+    assert rejected.value(limiter="test_full", reason="queue_full") == 1
+    assert rejected.value(limiter="test_full", reason="timeout") == 1
+
+
+def test_async_waiters_are_served_in_fifo_order():
+    limiter = ConcurrencyLimiter("test_fifo", limit=1, max_queue=10)
+    order = []
+
+    async def call(i):
+        async with limiter.aslot(timeout=5):
+            order.append(i)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(call(i) for i in range(5)))
+
+    asyncio.run(main())
+    assert order == [0, 1, 2, 3, 4]
+    assert limiter.idle
+
+
+def test_per_user_quota_does_not_block_other_users():
+    controller = AdmissionController(max_llm_calls=4, max_calls_per_user=1, max_queue=0, timeout=1)
+    with controller.llm_call("thread_id:a"):
+        with pytest.raises(AdmissionRejected):
+            with controller.llm_call("thread_id:a"):
+                pass
+        with controller.llm_call("thread_id:b"):
+            assert controller.llm.in_flight == 2
+    assert controller.llm.idle and not controller._users
+
+
+def test_user_key_prefers_user_then_thread():
+    assert user_key({"configurable": {"user_id": "u1", "thread_id": "t1"}}) == "user_id:u1"
+    assert user_key({"configurable": {"thread_id": "t1"}}) == "thread_id:t1"
+    assert user_key({}) == "anonymous"
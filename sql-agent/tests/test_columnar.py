@@ -0,0 +1,82 @@
+"""Unit tests for columnar query results against the bundled Chinook database."""
+
+import pytest
+
+from columnar import ColumnarResult
+from config import get_sqlite_connection_uri
+from database import SQLAgentDatabase
+
+
+@pytest.fixture(scope="module")
+def chinook():
+    return SQLAgentDatabase.from_uri(get_sqlite_connection_uri())
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT * FROM customers LIMIT 20",
+        "SELECT * FROM tracks LIMIT 50",
+        "SELECT BillingState, SUM(Total) FROM invoices GROUP BY BillingState",
+        "SELECT Name FROM genres WHERE Name = 'nothing'",
+        # Mixed int/float columns keep each value's own type
+        "SELECT 1, 2.5 UNION ALL SELECT 2.0, 3",
+        # Nullable integers stay exact, even beyond float64 precision
+        "SELECT 9223372036854775807 UNION ALL SELECT NULL",
+        "SELECT 9007199254740993 UNION ALL SELECT NULL",
+        "SELECT 1.5 UNION ALL SELECT NULL",
+    ],
+)
+def test_text_matches_row_rendering(chinook, query):
+    assert chinook.run_columnar(query).to_text() == chinook.run(query)
+
+
+def test_numeric_summary_is_vectorized(chinook):
+    result = chinook.run_columnar("SELECT InvoiceId, Total FROM invoices")
+    summary = result.summary()
+    assert result.kinds == ["int", "float"]
+    assert summary["InvoiceId"]["count"] == 412
+    assert round(summary["Total"]["sum"], 2) == 2328.6
+
+
+def test_nulls_are_preserved_and_ignored_by_summary():
+    result = ColumnarResult.from_rows(["id", "score", "name"], [(1, None, "a"), (None, 2.5, None)])
+    assert list(result.rows()) == [(1, None, "a"), (None, 2.5, None)]
+    assert result.summary() == {
+        "id": {"count": 1, "sum": 1.0, "min": 1.0, "max": 1.0, "mean": 1.0},
+        "score": {"count": 1, "sum": 2.5, "min": 2.5, "max": 2.5, "mean": 2.5},
+    }
+
+
+def test_large_results_are_summarized_for_the_llm():
+    result = ColumnarResult.from_rows(["n"], [(i,) for i in range(10)], max_text_rows=3)
+    assert result.to_text().startswith("[(0,), (1,), (2,)]\n(showing 3 of 10 rows")
+
+
+def test_batched_fetch_matches_single_batch(chinook, monkeypatch):
+    import database
+
+    query = "SELECT TrackId, Name, Composer, UnitPrice FROM tracks"
+    whole = chinook.run_columnar(query)
+    monkeypatch.setattr(database, "FETCH_BATCH_ROWS", 7)
+    batched = chinook.run_columnar(query)
+    assert batched.num_rows == whole.num_rows == 3503
+    assert batched.to_text() == whole.to_text()
+
+
+def test_artifact_survives_checkpoint_and_json_round_trips():
+    import json
+
+    from langchain_core.messages import ToolMessage
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+    result = ColumnarResult.from_rows(["id", "score", "name"], [(1, None, "a"), (None, 2.5, None)])
+    serde = JsonPlusSerializer()
+    message = serde.loads_typed(serde.dumps_typed(ToolMessage("t", tool_call_id="1", artifact=result)))
+    assert isinstance(message.artifact, dict)
+    restored = ColumnarResult.from_dict(message.artifact)
+    assert list(restored.rows()) == list(result.rows())
+    assert restored.summary() == result.summary()
+
+    as_json = json.loads(json.dumps(message.artifact, default=lambda a: a.tolist()))
+    assert list(ColumnarResult.from_dict(as_json).rows()) == list(result.rows())
@@ -0,0 +1,40 @@
+"""Unit tests for the few-shot example store (no LLM needed)."""
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from example_store import ExampleStore, format_examples, successful_queries
+
+
+def test_search_ranks_similar_questions_first(tmp_path):
+    store = ExampleStore(tmp_path / "examples.jsonl")
+    store.add("How many albums are in the database?", "SELECT COUNT(*) FROM albums")
+    store.add("List all albums by AC/DC.", "SELECT Title FROM albums JOIN artists USING (ArtistId)")
+    store.add("Which customers are from Brazil?", "SELECT FirstName FROM customers WHERE Country = 'Brazil'")
+
+    hits = store.search("How many customers are there?", k=2)
+    assert [e.sql for e, _ in hits][0] == "SELECT FirstName FROM customers WHERE Country = 'Brazil'"
+    assert len(hits) == 2
+    assert hits[0][1] >= hits[1][1]
+
+
+def test_store_persists_and_deduplicates(tmp_path):
+    path = tmp_path / "examples.jsonl"
+    store = ExampleStore(path)
+    assert store.add("What are all the genres?", "SELECT Name FROM genres", source="eval")
+    assert not store.add("what are  all the GENRES?", "SELECT * FROM genres")
+
+    reloaded = ExampleStore(path)
+    assert len(reloaded) == 1
+    assert reloaded.examples[0].source == "eval"
+    assert "SQL: SELECT Name FROM genres" in format_examples(reloaded.examples)
+
+
+def test_successful_queries_skips_failed_executions():
+    messages = [
+        HumanMessage(content="genres?"),
+        AIMessage(content="", tool_calls=[{"name": "sql_db_query", "args": {"query": "SELECT Nam FROM genres"}, "id": "1"}]),
+        ToolMessage(content="Error: no such column: Nam", tool_call_id="1"),
+        AIMessage(content="", tool_calls=[{"name": "sql_db_query", "args": {"query": "SELECT Name FROM genres"}, "id": "2"}]),
+        ToolMessage(content="[('Rock',)]", tool_call_id="2"),
+    ]
+    assert successful_queries(messages) == ["SELECT Name FROM genres"]
@@ -0,0 +1,71 @@
+"""Unit tests for result-set verification against the bundled Chinook database."""
+
+import pytest
+
+from config import get_sqlite_connection_uri
+from database import SQLAgentDatabase
+from eval.ground_truth import GroundTruthCache, ResultFingerprint
+
+
+@pytest.fixture(scope="module")
+def chinook():
+    return SQLAgentDatabase.from_uri(get_sqlite_connection_uri())
+
+
+def test_exact_match_ignores_order_aliases_and_extra_columns(chinook):
+    truth = GroundTruthCache(chinook)
+    expected = "SELECT Name FROM media_types"
+    assert truth.check(expected, "SELECT Name AS kind FROM media_types ORDER BY Name DESC")
+    assert truth.check(expected, "SELECT MediaTypeId, Name FROM media_types")
+    assert not truth.check(expected, "SELECT Name FROM media_types LIMIT 2")
+    assert not truth.check(expected, "SELECT Name FROM genres")
+    assert truth.check("SELECT COUNT(*) FROM tracks", "SELECT count(TrackId) FROM tracks;")
+
+
+def test_subset_match_accepts_a_limited_answer(chinook):
+    truth = GroundTruthCache(chinook)
+    expected = "SELECT Name FROM tracks WHERE Milliseconds > 300000"
+    limited = "SELECT Name FROM tracks WHERE Milliseconds > 300000 LIMIT 5"
+    assert truth.check(expected, limited, "subset")
+    assert not truth.check(expected, "SELECT Name FROM tracks LIMIT 5", "subset")
+    assert not truth.check(expected, "SELECT Name FROM tracks WHERE 0", "subset")
+
+
+def test_values_must_stay_in_the_same_rows(chinook):
+    truth = GroundTruthCache(chinook)
+    expected = "SELECT FirstName, Country FROM customers"
+    shuffled = (
+        "SELECT a.FirstName, b.Country FROM customers a "
+        "JOIN customers b ON b.CustomerId = (a.CustomerId % 59) + 1"
+    )
+    assert truth.check(expected, "SELECT Country, CustomerId, FirstName FROM customers")
+    assert not truth.check(expected, shuffled)
+    assert not truth.check(expected, shuffled + " LIMIT 1", "subset")
+    assert truth.check(expected, expected + " LIMIT 3", "subset")
+
+
+def test_failed_or_missing_sql_is_incorrect(chinook):
+    truth = GroundTruthCache(chinook)
+    assert not truth.check("SELECT Name FROM genres", "SELECT nope FROM genres")
+    assert not truth.check("SELECT Name FROM genres", None)
+
+
+def test_fingerprints_are_executed_once_and_persisted(chinook, tmp_path):
+    path = tmp_path / "ground_truth.json"
+    truth = GroundTruthCache(chinook, path)
+    truth.prime(["SELECT Name FROM genres"])
+    assert truth.check("SELECT Name FROM genres", "SELECT  Name FROM genres;")
+    assert (truth.misses, truth.hits) == (1, 2)
+    truth.save()
+
+    assert truth.check("SELECT Name FROM genres", "SELECT Name FROM genres ORDER BY Name")
+    truth.save()
+
+    reloaded = GroundTruthCache(chinook, path)
+    assert reloaded.fingerprint("SELECT Name FROM genres") == truth.fingerprint("SELECT Name FROM genres")
+    assert reloaded.misses == 0
+    assert "ORDER BY" not in path.read_text()
+
+
+def test_float_values_are_compared_after_rounding():
+    assert ResultFingerprint.from_rows([(1.0,), (2.50001,)]) == ResultFingerprint.from_rows([(2.5,), (1,)])
@@ -0,0 +1,97 @@
+"""Unit tests for LLM client settings and retry classification (no LLM needed)."""
+
+import json
+
+import httpx
+import pytest
+from langchain_core.exceptions import OutputParserException
+
+import llm
+from config import settings
+from llm import get_node_llm, get_retry_policy, is_transient_error
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def test_transient_errors_are_retried():
+    assert is_transient_error(httpx.ConnectError("refused"))
+    assert is_transient_error(httpx.ReadTimeout("slow"))
+    assert is_transient_error(ConnectionError("Failed to connect to Ollama"))
+    assert is_transient_error(_StatusError(429))
+    assert is_transient_error(_StatusError(503))
+    assert is_transient_error(ValueError("Expecting property name enclosed in double quotes: object key string"))
+
+
+def test_permanent_errors_are_not_retried():
+    assert not is_transient_error(_StatusError(400))
+    assert not is_transient_error(_StatusError(404))
+    assert not is_transient_error(ValueError("Unknown LLM_PROVIDER"))
+    assert not is_transient_error(TypeError("Object of type Decimal is not JSON serializable"))
+
+
+def test_parse_errors_are_retried():
+    assert is_transient_error(json.JSONDecodeError("Expecting value", "{", 1))
+    assert is_transient_error(OutputParserException("Could not parse tool call"))
+
+
+def test_retry_policy_follows_settings():
+    policy = get_retry_policy()
+    assert policy.max_attempts == settings.llm_max_retries + 1
+    assert policy.initial_interval == settings.llm_retry_initial_delay_seconds
+    assert policy.max_interval == settings.llm_retry_max_delay_seconds
+    assert policy.jitter is True
+
+
+@pytest.fixture
+def routed_models(monkeypatch):
+    """Route by model name without building real clients."""
+    monkeypatch.setattr(llm, "_build_llm", lambda model: model)
+    monkeypatch.setattr(settings, "llm_model", "base")
+    monkeypatch.setattr(settings, "llm_schema_model", "small-schema")
+    monkeypatch.setattr(settings, "llm_query_model", "small-query")
+    monkeypatch.setattr(settings, "llm_check_model", "")
+    monkeypatch.setattr(settings, "llm_escalation_model", "large")
+
+
+def test_single_policy_uses_base_model(routed_models):
+    for node in ("schema", "query", "check"):
+        assert get_node_llm(node, "single", escalated=True) == "base"
+
+
+def test_per_node_policy_falls_back_to_base_model(routed_models):
+    assert get_node_llm("schema", "per_node") == "small-schema"
+    assert get_node_llm("query", "per_node", escalated=True) == "small-query"
+    assert get_node_llm("check", "per_node") == "base"
+
+
+def test_escalate_policy_switches_query_nodes_only(routed_models):
+    assert get_node_llm("query", "escalate") == "small-query"
+    assert get_node_llm("query", "escalate", escalated=True) == "large"
+    assert get_node_llm("check", "escalate", escalated=True) == "large"
+    assert get_node_llm("schema", "escalate", escalated=True) == "small-schema"
+
+
+def test_bind_tools_cached_binds_once_per_toolset():
+    from eval.bench_overhead import fake_model
+    from langchain_core.tools import tool
+
+    @tool
+    def lookup(query: str) -> str:
+        """Look something up."""
+        return query
+
+    @tool("lookup")
+    def other_lookup(query: str) -> str:
+        """Look something else up."""
+        return query
+
+    model = fake_model()
+    bound = llm.bind_tools_cached(model, [lookup], tool_choice="any")
+    assert llm.bind_tools_cached(model, [other_lookup], tool_choice="any") is not bound
+    assert llm.bind_tools_cached(model, [lookup], tool_choice="any") is bound
+    assert llm.bind_tools_cached(model, [lookup]) is not bound
+    assert llm.bind_tools_cached(fake_model(), [lookup], tool_choice="any") is not bound
@@ -0,0 +1,35 @@
+"""Prompt layout: a byte-identical static prefix ahead of per-question content."""
+
+from langchain_core.messages import HumanMessage
+
+import custom_sql_agent as graph
+from config import settings
+from eval.bench_ttft import node_requests
+from eval.test_cases import TEST_CASES
+
+
+def test_every_node_starts_with_the_same_static_prefix():
+    first, second = (node_requests(graph, tc) for tc in TEST_CASES[:2])
+    for node in ("schema", "query", "check"):
+        system = first[node][0].content
+        assert system.startswith(graph.shared_system_prompt)
+        assert system == second[node][0].content
+        assert system in graph.system_prompts  # covered by the --incremental fingerprint
+        assert TEST_CASES[0]["question"] not in system
+    assert "invoice_items" in graph.shared_system_prompt
+
+
+def test_few_shot_examples_follow_the_system_prompt(tmp_path, monkeypatch):
+    from example_store import get_example_store
+
+    monkeypatch.setattr(settings, "few_shot_store_path", str(tmp_path / "examples.jsonl"))
+    get_example_store.cache_clear()
+    try:
+        get_example_store().add("How many albums are there?", "SELECT COUNT(*) FROM albums")
+        messages = graph.generate_query_messages([HumanMessage(content="How many albums exist?")])
+    finally:
+        get_example_store.cache_clear()
+
+    assert messages[0] is graph.generate_query_system_message
+    assert "SELECT COUNT(*) FROM albums" in messages[1].content
+    assert messages[2].content == "How many albums exist?"
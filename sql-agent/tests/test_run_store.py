@@ -0,0 +1,52 @@
+"""Unit tests for the incremental eval run store."""
+
+from langchain_community.tools.sql_database.tool import QuerySQLDatabaseTool
+
+from config import get_sqlite_connection_uri
+from database import SQLAgentDatabase
+from eval.evaluator import EvalResult
+from eval.run_store import RunStore, config_fingerprint
+
+CASE = {"id": "agg_001", "question": "How many employees are there?", "expected_answer_contains": ["8"]}
+
+
+def test_config_fingerprint_tracks_prompts_and_tools():
+    db = SQLAgentDatabase.from_uri(get_sqlite_connection_uri())
+    tool = QuerySQLDatabaseTool(db=db)
+    base = config_fingerprint(["prompt"], [tool], db)
+    assert base == config_fingerprint(["prompt"], [tool], db)
+    assert base != config_fingerprint(["prompt, edited"], [tool], db)
+    assert base != config_fingerprint(["prompt"], [QuerySQLDatabaseTool(db=db, description="other")], db)
+    assert base != config_fingerprint(["prompt"], [tool], db, routing_policy="escalate")
+
+
+def test_results_are_reused_until_the_fingerprint_changes(tmp_path):
+    path = tmp_path / "run_store.json"
+    store = RunStore(path, "chinook.db:sql_agent", "config-a")
+    assert store.get(CASE) is None
+    store.put(CASE, EvalResult(CASE["id"], CASE["question"], passed=True, latency_ms=900.0))
+    store.put({**CASE, "id": "broken"}, EvalResult("broken", "?", passed=False, error="connection refused"))
+    store.save()
+
+    reloaded = RunStore(path, "chinook.db:sql_agent", "config-a")
+    cached = reloaded.get(CASE)
+    assert cached.passed and cached.cached and cached.latency_ms == 900.0
+    assert reloaded.get({**CASE, "id": "broken"}) is None
+    assert reloaded.get({**CASE, "expected_answer_contains": ["eight"]}) is None
+    assert RunStore(path, "chinook.db:sql_agent", "config-b").get(CASE) is None
+    assert RunStore(path, "chinook.db:sql_agent", "config-a", reuse=False).get(CASE) is None
+    assert RunStore(path, "other.db:sql_agent", "config-a").get(CASE) is None
+
+
+def test_diff_reports_rerun_cases_against_previous_run(tmp_path):
+    path = tmp_path / "run_store.json"
+    store = RunStore(path, "scope", "config-a")
+    store.put(CASE, EvalResult(CASE["id"], CASE["question"], passed=True, latency_ms=900.0))
+    store.save()
+
+    store = RunStore(path, "scope", "config-b")
+    rerun = EvalResult(CASE["id"], CASE["question"], passed=False, latency_ms=400.0)
+    store.put(CASE, rerun)
+    assert store.diff([rerun]) == [
+        {"test_id": "agg_001", "was_passed": True, "passed": False, "was_latency_ms": 900.0, "latency_ms": 400.0}
+    ]
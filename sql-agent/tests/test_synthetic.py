@@ -0,0 +1,42 @@
+"""Unit tests for the synthetic benchmark database and question generator."""
+
+import sqlite3
+
+import pytest
+
+from eval.synthetic import build_database, generate_questions
+
+
+@pytest.fixture(scope="module")
+def synthetic_db(tmp_path_factory):
+    return build_database(tmp_path_factory.mktemp("synthetic") / "chinook_x3_w4.db", scale=3, extra_tables=4)
+
+
+def test_fact_tables_scale_and_keys_stay_consistent(synthetic_db):
+    conn = sqlite3.connect(synthetic_db)
+    assert conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0] == 3 * 3503
+    assert conn.execute("SELECT COUNT(*) FROM genres").fetchone()[0] == 25
+    orphans = conn.execute(
+        "SELECT COUNT(*) FROM invoice_items ii "
+        "LEFT JOIN invoices i ON i.InvoiceId = ii.InvoiceId "
+        "LEFT JOIN tracks t ON t.TrackId = ii.TrackId "
+        "WHERE i.InvoiceId IS NULL OR t.TrackId IS NULL"
+    ).fetchone()[0]
+    assert orphans == 0
+    assert conn.execute("SELECT COUNT(*) FROM artists WHERE Name = 'AC/DC #2'").fetchone()[0] == 1
+    tables = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name LIKE '%_log_%'")
+    assert tables.fetchone()[0] == 4
+
+
+def test_questions_are_deterministic_with_matching_ground_truth(synthetic_db):
+    cases = generate_questions(synthetic_db, count=14, seed=7)
+    assert cases == generate_questions(synthetic_db, count=14, seed=7)
+    assert len({c["question"] for c in cases}) == len(cases) == 14
+    assert {"aggregation", "join", "filter", "complex", "schema"} <= {c["category"] for c in cases}
+
+    conn = sqlite3.connect(synthetic_db)
+    for case in cases:
+        rows = conn.execute(case["expected_sql"])
+        # Counts are expected thousands-separated, as in TEST_CASES ("3,503")
+        values = {f"{v:,}" if isinstance(v, int) else str(v) for row in rows for v in row}
+        assert set(case["expected_answer_contains"]) <= values, case["id"]
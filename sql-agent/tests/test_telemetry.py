@@ -0,0 +1,42 @@
+"""Unit tests for local telemetry: metrics rendering and JSON spans."""
+
+import json
+import logging
+
+import pytest
+
+from telemetry import MetricsRegistry, span, span_logger
+
+
+def test_prometheus_rendering():
+    registry = MetricsRegistry()
+    hits = registry.counter("cache_hits_total", "Cache hits.")
+    hits.inc(cache="bind_tools")
+    hits.inc(2, cache="bind_tools")
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    latency.observe(0.05, node="a")
+    latency.observe(0.5, node="a")
+    latency.observe(5.0, node="a")
+
+    text = registry.render_prometheus()
+    assert "# TYPE cache_hits_total counter" in text
+    assert 'cache_hits_total{cache="bind_tools"} 3' in text
+    assert 'latency_seconds_bucket{node="a",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{node="a",le="1"} 2' in text
+    assert 'latency_seconds_bucket{node="a",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{node="a"} 3' in text
+    assert registry.counter("cache_hits_total", "ignored") is hits
+
+
+def test_span_emits_json_with_status(caplog):
+    with caplog.at_level(logging.DEBUG, logger=span_logger.name):
+        with span("execute", "sql", statement="SELECT 1") as attrs:
+            attrs["rows"] = 1
+        with pytest.raises(ValueError):
+            with span("execute", "sql"):
+                raise ValueError("boom")
+
+    ok, failed = [json.loads(r.getMessage()) for r in caplog.records if r.name == span_logger.name]
+    assert ok["kind"] == "sql" and ok["status"] == "ok"
+    assert ok["attributes"] == {"statement": "SELECT 1", "rows": 1}
+    assert failed["status"] == "error" and "boom" in failed["error"]
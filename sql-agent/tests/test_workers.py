@@ -0,0 +1,23 @@
+"""Multi-process eval sharding with the fake model (no model server needed)."""
+
+import asyncio
+
+from eval.evaluator import EvalResult, SQLAgentEvaluator
+from eval.run_store import RunStore
+from eval.test_cases import TEST_CASES
+from eval.workers import WorkerConfig, run_sharded
+
+
+def test_sharded_results_are_merged_in_case_order(tmp_path):
+    cases = TEST_CASES[:3]
+    store = RunStore(tmp_path / "run_store.json", "scope", "config")
+    store.put(cases[1], EvalResult(cases[1]["id"], cases[1]["question"], passed=True))
+    evaluator = SQLAgentEvaluator(agent=None, run_store=store)
+    config = WorkerConfig(agent="custom_sql_agent", fast=True, fake_llm=True)
+
+    summary = asyncio.run(run_sharded(evaluator, cases, 2, config, verbose=False))
+
+    assert [r.test_id for r in evaluator.results] == [tc["id"] for tc in cases]
+    assert [r.cached for r in evaluator.results] == [False, True, False]
+    assert all(r.error is None and r.executed_sql for r in evaluator.results if not r.cached)
+    assert summary.total == 3 and summary.cached == 1